@@ -20,34 +20,240 @@ IPC Bridge URL Configuration:
     If ASH_IPC_URL is set, it takes precedence. Otherwise, ASH_IPC_HOST and
     ASH_IPC_PORT are used to construct the URL. Default values are
     127.0.0.1:54112.
+
+    Option 3 (Unix domain socket, set by ash on macOS/Linux):
+        ASH_IPC_SOCKET=/tmp/ash-ipc-501.sock   (ASH_IPC_UDS also accepted)
+
+    If ASH_IPC_SOCKET is set (and ASH_IPC_URL is not), requests go over the
+    socket instead of TCP. TCP is used if the socket file does not exist.
+
+    ASH_IPC_EVENTS=1 subscribes to the bridge's connection change events, so
+    cached connection info is kept longer and dropped as soon as it changes.
 """
 
+import asyncio
+import atexit
+import functools
 import json
 import logging
 import os
+import re
+import shlex
+import threading
+import time
+import urllib.parse
+import uuid
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
 from qwen_agent.tools.base import BaseTool, register_tool
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+try:
+    import orjson  # Optional: much faster (de)serialization of large command outputs
+except ImportError:
+    orjson = None
 
 # Module-level logger
 _logger = logging.getLogger(__name__)
 
+
+def _json_loads(data):
+    """Parse JSON from str or bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _parse_params(params: str) -> dict:
+    """Parse tool parameters, trying strict JSON first and falling back to json5."""
+    try:
+        return _json_loads(params)
+    except ValueError:
+        # LLM-emitted arguments are occasionally relaxed JSON (single quotes, trailing commas);
+        # json5 is pure Python and only needed here, so it is imported on first use
+        import json5
+        return json5.loads(params)
+
+
+def _json_dumps(obj) -> str:
+    """Serialize to a JSON string without ASCII-escaping, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _json_dumps_bytes(obj) -> bytes:
+    """Serialize to UTF-8 JSON bytes (request bodies), using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+@functools.lru_cache(maxsize=32)
+def _channel_prefix(channel: str) -> bytes:
+    """Encoded '{"channel":"...","args":' prefix; there are only a handful of channels."""
+    return _json_dumps_bytes({"channel": channel})[:-1] + b',"args":'
+
+
+def _ipc_request_body(channel: str, args: tuple, request_id: str) -> bytes:
+    """Encode { "channel": ..., "args": [...], "request_id": ... } reusing the cached channel prefix."""
+    # Tuples encode as JSON arrays, so args needs no list() copy
+    return _channel_prefix(channel) + _json_dumps_bytes(args) + b',"request_id":"' + request_id.encode('ascii') + b'"}'
+
+
+# The IPC wire format is JSON in both directions; both ends are encoded and
+# decoded with orjson (when installed) rather than requests'/aiohttp's stdlib json.
+_IPC_HEADERS = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+
 # Base URL for ash IPC bridge - configurable via environment variables
 # Option 1: Set ASH_IPC_URL to full URL (e.g., "http://127.0.0.1:54112")
 # Option 2: Set ASH_IPC_HOST (default: "127.0.0.1") and ASH_IPC_PORT (default: 54112)
 _IPC_HOST = os.getenv('ASH_IPC_HOST', '127.0.0.1')
-_IPC_PORT = os.getenv('ASH_IPC_PORT', '54112')
+_IPC_DEFAULT_PORT = 54112
+try:
+    _IPC_PORT = int(os.getenv('ASH_IPC_PORT', str(_IPC_DEFAULT_PORT)))
+    if not 1 <= _IPC_PORT <= 65535:
+        raise ValueError(f"port {_IPC_PORT} out of range")
+except ValueError as e:
+    # Fail here rather than on every tool call with a connection error
+    _logger.error("[IPC] Invalid ASH_IPC_PORT (%s), using %d", e, _IPC_DEFAULT_PORT)
+    _IPC_PORT = _IPC_DEFAULT_PORT
 _IPC_URL_FULL = os.getenv('ASH_IPC_URL', None)
 
-if _IPC_URL_FULL:
+# ASH_IPC_UDS is accepted as an alias for ASH_IPC_SOCKET
+_IPC_SOCKET = os.getenv('ASH_IPC_SOCKET') or os.getenv('ASH_IPC_UDS')
+
+# Use the Unix domain socket only if the bridge actually created it
+_IPC_USE_SOCKET = False
+if _IPC_SOCKET and not _IPC_URL_FULL:
+    if os.path.exists(_IPC_SOCKET):
+        try:
+            import requests_unixsocket
+            _IPC_USE_SOCKET = True
+        except ImportError:
+            _logger.warning("[IPC] ASH_IPC_SOCKET is set but requests-unixsocket is not installed, using TCP")
+    else:
+        _logger.warning("[IPC] IPC socket %s not found, using TCP", _IPC_SOCKET)
+
+if _IPC_USE_SOCKET:
+    # requests-unixsocket expects the socket path percent-encoded in place of the host
+    ASH_IPC_URL = f"http+unix://{urllib.parse.quote(_IPC_SOCKET, safe='')}"
+elif _IPC_URL_FULL:
     # Use full URL if provided
     ASH_IPC_URL = _IPC_URL_FULL
 else:
     # Construct URL from host and port
     ASH_IPC_URL = f"http://{_IPC_HOST}:{_IPC_PORT}"
 
-# Log IPC configuration on module load
-_logger.info(f"[IPC] Configured IPC bridge URL: {ASH_IPC_URL} (configure via ASH_IPC_URL, ASH_IPC_HOST, or ASH_IPC_PORT env vars)")
+# Log IPC configuration on module load (set ASH_LOG_CONFIG=0 to silence)
+if os.getenv('ASH_LOG_CONFIG', '1') == '1':
+    _logger.info("[IPC] Configured IPC bridge URL: %s (configure via ASH_IPC_URL, ASH_IPC_HOST, ASH_IPC_PORT, or ASH_IPC_SOCKET env vars)", ASH_IPC_URL)
+
+# Shared HTTP session for the IPC bridge.
+# Keeps the loopback connection alive between tool calls instead of opening
+# a new connection for every request.
+if _IPC_USE_SOCKET:
+    _SESSION = requests_unixsocket.Session()
+else:
+    _SESSION = requests.Session()
+    _SESSION.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=0))
+atexit.register(_SESSION.close)
+
+# Endpoint URLs, built once instead of on every call
+_IPC_INVOKE_URL = f"{ASH_IPC_URL}/ipc-invoke"
+_IPC_INVOKE_STREAM_URL = f"{ASH_IPC_URL}/ipc-invoke-stream"
+_IPC_CANCEL_URL = f"{ASH_IPC_URL}/ipc-cancel"
+
+# aiohttp talks to the socket through its connector, so the URL host is a placeholder
+_IPC_AIO_URL = "http://localhost" if _IPC_USE_SOCKET else ASH_IPC_URL
+
+# Shared aiohttp session for callers running on an event loop (e.g. FastAPI
+# endpoints). Created lazily because it must be bound to the running loop.
+_aio_session: Optional[aiohttp.ClientSession] = None
+_AIO_MAX_CONNECTIONS = 100  # Concurrent in-flight bridge requests (keep-alive pooled)
+_aio_session_lock = asyncio.Lock()
+
+
+async def _get_aio_session() -> aiohttp.ClientSession:
+    global _aio_session
+    async with _aio_session_lock:
+        if _aio_session is None or _aio_session.closed:
+            if _IPC_USE_SOCKET:
+                connector = aiohttp.UnixConnector(path=_IPC_SOCKET, limit=_AIO_MAX_CONNECTIONS)
+            else:
+                connector = aiohttp.TCPConnector(limit=_AIO_MAX_CONNECTIONS)
+            _aio_session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=300)  # 5 minutes for long-running commands
+            )
+    return _aio_session
+
+
+async def close_ash_ipc_async() -> None:
+    """Close the shared aiohttp session (call on application shutdown)."""
+    global _aio_session
+    if _aio_session is not None and not _aio_session.closed:
+        await _aio_session.close()
+    _aio_session = None
+
+
+class IPCError(Exception):
+    """Error reported by the IPC bridge, or failure to reach it."""
+
+
+def _unwrap_ipc_result(result: Dict[str, Any]) -> Any:
+    """Return the handler result from an IPC bridge response body, or raise on failure."""
+    if result.get("success"):
+        return result.get("result", {})
+
+    error_msg = result.get("error", "Unknown IPC bridge error")
+
+    # If user denied, log as info not error
+    if "denied by user" in error_msg or "denied permission" in error_msg:
+        _logger.info("[IPC] Request denied: %s", error_msg)
+    else:
+        _logger.error("[IPC] Error: %s", error_msg)
+
+    raise IPCError(error_msg)
+
+# Connecting to the local bridge is near-instant, so fail fast if it is down;
+# the read timeout still allows long-running commands (5 minutes by default).
+_IPC_CONNECT_TIMEOUT = float(os.getenv('ASH_IPC_CONNECT_TIMEOUT', '2'))
+_IPC_READ_TIMEOUT = float(os.getenv('ASH_IPC_READ_TIMEOUT', '300'))
+
+# Per-channel read timeouts in seconds (None = wait indefinitely)
+_CHANNEL_TIMEOUTS: Dict[str, Optional[float]] = {
+    'ssh-list-connections': 5,
+    'list-connections': 5,
+    'ask-user': None,  # The user may take minutes; the bridge enforces its own limit
+    'exec-command-auto': _IPC_READ_TIMEOUT,
+    'ssh-exec-command': _IPC_READ_TIMEOUT,
+    'telnet-exec-command': _IPC_READ_TIMEOUT,
+    'serial-exec-command': _IPC_READ_TIMEOUT,
+    'local-exec-command': _IPC_READ_TIMEOUT,
+}
+_DEFAULT_CHANNEL_TIMEOUT = 30
+
+
+def _channel_timeout(channel: str) -> Tuple[float, Optional[float]]:
+    """(connect, read) timeout for a channel, as accepted by requests."""
+    return _IPC_CONNECT_TIMEOUT, _CHANNEL_TIMEOUTS.get(channel, _DEFAULT_CHANNEL_TIMEOUT)
+
+
+def _cancel_ipc_request(request_id: str) -> None:
+    """Ask the bridge to stop a request we gave up waiting for (best effort)."""
+    try:
+        _SESSION.post(
+            _IPC_CANCEL_URL,
+            data=_json_dumps_bytes({"request_id": request_id}),
+            headers=_IPC_HEADERS,
+            timeout=2
+        )
+    except requests.exceptions.RequestException as e:
+        _logger.debug("[IPC] Cancel of %s failed: %s", request_id, e)
 
 def call_ash_ipc(channel: str, *args) -> Dict[str, Any]:
     """
@@ -60,58 +266,487 @@ def call_ash_ipc(channel: str, *args) -> Dict[str, Any]:
     Returns:
         Result from the IPC handler
     """
+    request_id = uuid.uuid4().hex
     try:
-        url = f"{ASH_IPC_URL}/ipc-invoke"
-        payload = {
-            "channel": channel,
-            "args": list(args)
-        }
+        url = _IPC_INVOKE_URL
+        body = _ipc_request_body(channel, args, request_id)
         
-        _logger.info(f"[IPC] Calling {channel} with args: {len(args)} arguments")
-        _logger.debug(f"[IPC] Target URL: {url}")
-        _logger.debug(f"[IPC] Payload: {payload}")
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug("[IPC] Calling %s with args: %d arguments", channel, len(args))
+            _logger.debug("[IPC] Target URL: %s", url)
+            _logger.debug("[IPC] Payload: %s", body)
         
-        # IPC bridge expects: { "channel": "...", "args": [...] }
-        # Use longer timeout for SSH commands that might take time (e.g., long-running commands)
-        # 5 minutes should be enough for most commands
-        response = requests.post(
-            url,
-            json=payload,
-            timeout=300  # 5 minutes for long-running commands
-        )
-        
-        _logger.info(f"[IPC] Response status: {response.status_code}")
+        # IPC bridge expects: { "channel": "...", "args": [...], "request_id": "..." }
+        try:
+            # stream=True: the body is read below in one call rather than
+            # accumulated by requests in small chunks
+            response = _SESSION.post(
+                url,
+                data=body,
+                headers=_IPC_HEADERS,
+                timeout=_channel_timeout(channel),
+                stream=True
+            )
+        except requests.exceptions.ReadTimeout:
+            # Don't leave the command running on the bridge
+            _cancel_ipc_request(request_id)
+            raise
         
-        if response.status_code == 200:
-            result = response.json()
-            _logger.debug(f"[IPC] Response: {result}")
-            if result.get("success"):
-                return result.get("result", {})
+        with response:  # Returns the connection to the pool
+            _logger.debug("[IPC] Response status: %s", response.status_code)
+            
+            if response.status_code == 200:
+                # Parse the raw body bytes directly (no str decode, no chunk list)
+                result = _json_loads(response.raw.read(decode_content=True))
+                _logger.debug("[IPC] Response: %s", result)
+                return _unwrap_ipc_result(result)
             else:
-                error_msg = result.get("error", "Unknown IPC bridge error")
+                error_text = response.text
+                _logger.error("[IPC] HTTP %s: %s", response.status_code, error_text)
+                raise IPCError(f"IPC bridge returned status {response.status_code}: {error_text}")
+    except requests.exceptions.ConnectionError as e:
+        _logger.error("[IPC] Connection error: %s", e)
+        _logger.error("[IPC] Failed to connect to IPC bridge at %s", ASH_IPC_URL)
+        _logger.error("[IPC] Make sure ash application is running and IPC bridge is accessible")
+        raise IPCError(f"Failed to connect to IPC bridge at {ASH_IPC_URL}. Is ash running? You can configure the URL via ASH_IPC_URL environment variable.")
+    except requests.exceptions.RequestException as e:
+        _logger.error("[IPC] Request error: %s", e)
+        raise IPCError(f"Failed to connect to IPC bridge: {str(e)}")
+    except IPCError:
+        # Already logged and worded for the caller
+        raise
+    except Exception as e:
+        _logger.error("[IPC] Unexpected error: %s", e)
+        raise IPCError(f"IPC bridge error: {str(e)}")
+
+def call_ash_ipc_stream(channel: str, *args) -> Iterator[Dict[str, Any]]:
+    """
+    Call the IPC bridge's streaming endpoint and yield response frames as they arrive.
+    
+    The bridge answers with newline-delimited JSON, so large command output is
+    parsed incrementally instead of as one multi-megabyte response body.
+    
+    Args:
+        channel: IPC channel name (e.g., 'exec-command-auto')
+        *args: Arguments to pass to the IPC handler
+    
+    Yields:
+        Frames such as {"stream": "stdout", "chunk": "..."} and finally {"done": True, ...}
+    """
+    request_id = uuid.uuid4().hex
+    try:
+        url = _IPC_INVOKE_STREAM_URL
+        body = _ipc_request_body(channel, args, request_id)
+        
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug("[IPC] Streaming %s with args: %d arguments", channel, len(args))
+        
+        timeout = _channel_timeout(channel)  # The read timeout applies between reads
+        try:
+            with _SESSION.post(
+                url,
+                data=body,
+                headers=_IPC_HEADERS,
+                timeout=timeout,
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    error_text = response.text
+                    _logger.error("[IPC] HTTP %s: %s", response.status_code, error_text)
+                    raise IPCError(f"IPC bridge returned status {response.status_code}: {error_text}")
                 
-                # If user denied, log as info not error
-                if "denied by user" in error_msg or "denied permission" in error_msg:
-                    _logger.info(f"[IPC] Request denied: {error_msg}")
-                else:
-                    _logger.error(f"[IPC] Error: {error_msg}")
-                    
-                raise Exception(error_msg)
-        else:
-            error_text = response.text
-            _logger.error(f"[IPC] HTTP {response.status_code}: {error_text}")
-            raise Exception(f"IPC bridge returned status {response.status_code}: {error_text}")
+                for line in response.iter_lines(chunk_size=64 * 1024):
+                    if not line:
+                        continue
+                    frame = _json_loads(line)
+                    if 'error' in frame and not frame.get('done'):
+                        raise IPCError(frame['error'])
+                    yield frame
+        except (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError) as e:
+            # A read timeout mid-stream surfaces as a ConnectionError wrapping
+            # urllib3's ReadTimeoutError
+            timed_out = isinstance(e, requests.exceptions.ReadTimeout) or \
+                (e.args and isinstance(e.args[0], ReadTimeoutError))
+            if not timed_out:
+                raise
+            # Don't leave the command running on the bridge
+            _cancel_ipc_request(request_id)
+            _logger.error("[IPC] %s timed out after %ss without output", channel, timeout[1])
+            raise IPCError(f"IPC request {channel} timed out after {timeout[1]}s without output; cancelled it on the bridge")
+    except IPCError:
+        # Already logged and worded for the caller
+        raise
     except requests.exceptions.ConnectionError as e:
-        _logger.error(f"[IPC] Connection error: {str(e)}")
-        _logger.error(f"[IPC] Failed to connect to IPC bridge at {ASH_IPC_URL}")
-        _logger.error(f"[IPC] Make sure ash application is running and IPC bridge is accessible")
-        raise Exception(f"Failed to connect to IPC bridge at {ASH_IPC_URL}. Is ash running? You can configure the URL via ASH_IPC_URL environment variable.")
+        _logger.error("[IPC] Connection error: %s", e)
+        _logger.error("[IPC] Failed to connect to IPC bridge at %s", ASH_IPC_URL)
+        raise IPCError(f"Failed to connect to IPC bridge at {ASH_IPC_URL}. Is ash running? You can configure the URL via ASH_IPC_URL environment variable.")
     except requests.exceptions.RequestException as e:
-        _logger.error(f"[IPC] Request error: {str(e)}")
-        raise Exception(f"Failed to connect to IPC bridge: {str(e)}")
+        _logger.error("[IPC] Request error: %s", e)
+        raise IPCError(f"Failed to connect to IPC bridge: {str(e)}")
+
+async def call_ash_ipc_async(channel: str, *args) -> Dict[str, Any]:
+    """
+    Async variant of call_ash_ipc for callers running on an event loop.
+    
+    Args:
+        channel: IPC channel name (e.g., 'ssh-exec-command', 'ssh-list-connections')
+        *args: Arguments to pass to the IPC handler
+    
+    Returns:
+        Result from the IPC handler
+    """
+    request_id = uuid.uuid4().hex
+    try:
+        url = f"{_IPC_AIO_URL}/ipc-invoke"
+        body = _ipc_request_body(channel, args, request_id)
+        
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug("[IPC] Calling %s (async) with args: %d arguments", channel, len(args))
+        
+        session = await _get_aio_session()
+        connect_timeout, read_timeout = _channel_timeout(channel)
+        timeout = aiohttp.ClientTimeout(total=read_timeout, connect=connect_timeout)
+        async with session.post(url, data=body, headers=_IPC_HEADERS, timeout=timeout) as response:
+            _logger.debug("[IPC] Response status: %s", response.status)
+            
+            if response.status == 200:
+                result = _json_loads(await response.read())
+                _logger.debug("[IPC] Response: %s", result)
+                return _unwrap_ipc_result(result)
+            else:
+                error_text = await response.text()
+                _logger.error("[IPC] HTTP %s: %s", response.status, error_text)
+                raise IPCError(f"IPC bridge returned status {response.status}: {error_text}")
+    except aiohttp.ClientConnectorError as e:
+        _logger.error("[IPC] Connection error: %s", e)
+        _logger.error("[IPC] Failed to connect to IPC bridge at %s", ASH_IPC_URL)
+        raise IPCError(f"Failed to connect to IPC bridge at {ASH_IPC_URL}. Is ash running? You can configure the URL via ASH_IPC_URL environment variable.")
+    except asyncio.TimeoutError as e:
+        # Don't leave the command running on the bridge
+        try:
+            async with session.post(
+                f"{_IPC_AIO_URL}/ipc-cancel",
+                data=_json_dumps_bytes({"request_id": request_id}),
+                headers=_IPC_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=2)
+            ):
+                pass
+        except (aiohttp.ClientError, asyncio.TimeoutError) as cancel_error:
+            _logger.debug("[IPC] Cancel of %s failed: %s", request_id, cancel_error)
+        _logger.error("[IPC] Request error: %s", e)
+        raise IPCError(f"Failed to connect to IPC bridge: {str(e)}")
+    except aiohttp.ClientError as e:
+        _logger.error("[IPC] Request error: %s", e)
+        raise IPCError(f"Failed to connect to IPC bridge: {str(e)}")
+    except IPCError:
+        # Already logged and worded for the caller
+        raise
     except Exception as e:
-        _logger.error(f"[IPC] Unexpected error: {str(e)}")
-        raise Exception(f"IPC bridge error: {str(e)}")
+        _logger.error("[IPC] Unexpected error: %s", e)
+        raise IPCError(f"IPC bridge error: {str(e)}")
+
+# Short-lived cache of active connections, so ash_execute_command does not need
+# an ssh-list-connections round-trip before every command.
+_CONN_TTL = 3.0  # seconds
+_CONN_TTL_WITH_EVENTS = 60.0  # seconds, while the bridge pushes change events
+_CONN_TYPE_CACHE: Dict[str, Tuple[float, str]] = {}  # {connection_id: (timestamp, type)}
+_CONN_LIST_CACHE: Optional[Tuple[float, list]] = None  # (timestamp, connections)
+# ash_list_connections result as returned to the agent, which may call it repeatedly in one turn
+_LIST_TTL = 1.5  # seconds
+_LIST_RESULT_CACHE: Optional[Tuple[float, str]] = None  # (timestamp, json_str)
+
+
+def _cache_connections(connections: list, result_json: Optional[str] = None) -> None:
+    """Replace the cached connection list and per-ID type map (and the tool result, if given)."""
+    global _CONN_LIST_CACHE, _LIST_RESULT_CACHE, _CONN_TYPE_CACHE
+    now = time.monotonic()
+    _CONN_LIST_CACHE = (now, connections)
+    _LIST_RESULT_CACHE = (now, result_json) if result_json is not None else None
+    # Swapped in whole: tools running in parallel must never see a half-filled map
+    _CONN_TYPE_CACHE = {
+        conn.get('connectionId'): (now, conn.get('type', 'ssh'))  # Default to ssh if missing
+        for conn in connections
+    }
+
+
+def _invalidate_conn_cache(connection_id: Optional[str] = None) -> None:
+    """Drop cached connection info (for one connection, or all of them)."""
+    global _CONN_LIST_CACHE, _LIST_RESULT_CACHE, _CONN_TYPE_CACHE
+    _CONN_LIST_CACHE = None
+    _LIST_RESULT_CACHE = None
+    if connection_id is None:
+        _CONN_TYPE_CACHE = {}
+    else:
+        _CONN_TYPE_CACHE.pop(connection_id, None)
+    _invalidate_result_cache(connection_id)
+    if connection_id is None:
+        _CWD_CACHE.clear()
+    else:
+        _CWD_CACHE.pop(connection_id, None)
+
+
+# Command result cache: models often re-run the same inspection command (uname -a,
+# cat /etc/os-release, ...) within one task. Only plain invocations of read-only,
+# slowly-changing commands are cached, and any other command on the connection
+# drops its entries since it may have changed what they would return.
+# Opt-in (e.g. ASH_RESULT_CACHE_TTL=30): files can still change outside the agent,
+# from the user's own terminal or another process, and a cached `cat` or `ls` would
+# then silently return stale output.
+_RESULT_TTL = float(os.getenv('ASH_RESULT_CACHE_TTL', '0'))
+_RESULT_CACHE_MAX = 256
+_RESULT_CACHE: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_RESULT_CACHE_LOCK = threading.Lock()
+_CACHEABLE_COMMANDS = frozenset({
+    'arch', 'cat', 'getconf', 'hostname', 'id', 'ls', 'lsb_release', 'lsblk',
+    'lscpu', 'nproc', 'type', 'uname', 'which', 'whoami',
+})
+# Pipelines, redirects, substitutions, globs, ... make the effect of a command hard to tell
+_SHELL_SPECIAL = re.compile(r'[;&|<>`$(){}*?\[\]~!\\\n]')
+# Live kernel/device state changes from one read to the next
+_VOLATILE_PATHS = ('/proc', '/sys', '/dev')
+
+
+def _result_cache_key(connection_id: str, command: str) -> Optional[Tuple[str, str]]:
+    """Return the cache key for command, or None if its result must not be cached."""
+    if _RESULT_TTL <= 0 or not connection_id or not command or _SHELL_SPECIAL.search(command):
+        return None
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    if not argv or argv[0] not in _CACHEABLE_COMMANDS:
+        return None
+    if any(arg.startswith(_VOLATILE_PATHS) for arg in argv[1:]):
+        return None
+    return (connection_id, '\0'.join(argv))  # NUL keeps `cat "a b"` apart from `cat a b`
+
+
+def _result_cache_get(key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+    with _RESULT_CACHE_LOCK:
+        entry = _RESULT_CACHE.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > _RESULT_TTL:
+            del _RESULT_CACHE[key]
+            return None
+        _RESULT_CACHE.move_to_end(key)
+        return dict(entry[1])
+
+
+def _result_cache_put(key: Tuple[str, str], result: Dict[str, Any]) -> None:
+    with _RESULT_CACHE_LOCK:
+        _RESULT_CACHE[key] = (time.monotonic(), dict(result))
+        _RESULT_CACHE.move_to_end(key)
+        while len(_RESULT_CACHE) > _RESULT_CACHE_MAX:
+            _RESULT_CACHE.popitem(last=False)
+
+
+def _invalidate_result_cache(connection_id: Optional[str] = None) -> None:
+    """Drop cached command results (for one connection, or all of them)."""
+    with _RESULT_CACHE_LOCK:
+        if connection_id is None:
+            _RESULT_CACHE.clear()
+        else:
+            for key in [k for k in _RESULT_CACHE if k[0] == connection_id]:
+                del _RESULT_CACHE[key]
+
+
+def _resolve_conn_type(connection_id: str) -> Optional[str]:
+    """Return the connection type for connection_id, or None if it is not active."""
+    ttl = _CONN_TTL_WITH_EVENTS if _ipc_events_connected.is_set() else _CONN_TTL
+    cached = _CONN_TYPE_CACHE.get(connection_id)
+    if cached and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+
+    list_result = call_ash_ipc('ssh-list-connections')
+    _cache_connections(list_result.get('connections', []))
+    cached = _CONN_TYPE_CACHE.get(connection_id)
+    return cached[1] if cached else None
+
+
+async def _resolve_conn_type_async(connection_id: str) -> Optional[str]:
+    """Async variant of _resolve_conn_type for the FastAPI handlers."""
+    ttl = _CONN_TTL_WITH_EVENTS if _ipc_events_connected.is_set() else _CONN_TTL
+    cached = _CONN_TYPE_CACHE.get(connection_id)
+    if cached and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+
+    list_result = await call_ash_ipc_async('ssh-list-connections')
+    _cache_connections(list_result.get('connections', []))
+    cached = _CONN_TYPE_CACHE.get(connection_id)
+    return cached[1] if cached else None
+
+
+# Working directory per connection, used for the system prompt. It only changes
+# when a command moves the shell (cd/pushd/popd), which drops the entry; the TTL
+# covers changes made by the user typing in the terminal.
+_CWD_TTL = float(os.getenv('ASH_CWD_CACHE_TTL', '30'))
+_CWD_CACHE: Dict[str, Tuple[float, str]] = {}  # {connection_id: (timestamp, cwd)}
+_CHANGES_CWD = re.compile(r'(?:^|[;&|(])\s*(?:cd|pushd|popd)\b')
+
+
+def _cached_cwd(connection_id: str) -> Optional[str]:
+    cached = _CWD_CACHE.get(connection_id)
+    if cached and time.monotonic() - cached[0] < _CWD_TTL:
+        return cached[1]
+    return None
+
+
+def _cache_cwd(connection_id: str, cwd: str) -> None:
+    _CWD_CACHE[connection_id] = (time.monotonic(), cwd)
+
+
+# Optional push invalidation: subscribe to the bridge's /ipc-events stream so the
+# connection cache is dropped when connections change instead of only on a timer.
+_IPC_EVENTS_ENABLED = os.getenv('ASH_IPC_EVENTS', '0') == '1'
+_ipc_events_connected = threading.Event()
+
+
+def _handle_ipc_event(event: str, data: Dict[str, Any]) -> None:
+    """Apply a bridge event to the connection cache."""
+    global _CONN_LIST_CACHE, _LIST_RESULT_CACHE
+    _logger.debug("[IPC] Event %s: %s", event, data)
+    if event == 'connection-closed':
+        _invalidate_conn_cache(data.get('connectionId'))
+    elif event == 'connections-changed':
+        _CONN_LIST_CACHE = None
+        _LIST_RESULT_CACHE = None
+        for connection_id in data.get('removed', []):
+            _CONN_TYPE_CACHE.pop(connection_id, None)
+
+
+def _start_sse_listener() -> None:
+    """Listen for bridge events forever, reconnecting with backoff (runs in a daemon thread)."""
+    url = f"{ASH_IPC_URL}/ipc-events"
+    delay = 1.0
+    while True:
+        try:
+            with _SESSION.get(url, stream=True, timeout=(_IPC_CONNECT_TIMEOUT, None)) as response:
+                if response.status_code == 404:
+                    _logger.info("[IPC] IPC bridge has no /ipc-events endpoint, using timed cache expiry")
+                    return
+                response.raise_for_status()
+                
+                # Changes may have been missed while disconnected
+                _invalidate_conn_cache()
+                _ipc_events_connected.set()
+                delay = 1.0
+                
+                event = 'message'
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line:
+                        event = 'message'
+                    elif line.startswith('event:'):
+                        event = line[6:].strip()
+                    elif line.startswith('data:'):
+                        _handle_ipc_event(event, _json_loads(line[5:].strip() or '{}'))
+                    # Lines starting with ':' are heartbeats
+        except Exception as e:
+            _logger.debug("[IPC] Event stream error: %s", e)
+        
+        _ipc_events_connected.clear()
+        time.sleep(delay)
+        delay = min(delay * 2, 30.0)
+
+
+if _IPC_EVENTS_ENABLED:
+    threading.Thread(target=_start_sse_listener, name='ash-ipc-events', daemon=True).start()
+
+# Set to False once the bridge reports it has no streaming endpoint (older ash versions)
+_EXEC_STREAM_SUPPORTED = True
+# Same default cap (in characters) and marker as the exec handlers' maxOutputSize
+_EXEC_OUTPUT_MAX = 1024 * 1024
+_OUTPUT_TRUNCATED = '\n... [Output Truncated]'
+
+
+def _execute_streamed(connection_id: str, command: str) -> Optional[Dict[str, Any]]:
+    """
+    Execute via the bridge's streaming endpoint, collecting stdout/stderr as it arrives.
+    
+    Returns a result shaped like the exec channels' ({success, output, error, exitCode, type}),
+    or None if the bridge does not support streaming.
+    """
+    global _EXEC_STREAM_SUPPORTED
+    if not _EXEC_STREAM_SUPPORTED:
+        return None
+    
+    parts = {'stdout': [], 'stderr': []}
+    sizes = {'stdout': 0, 'stderr': 0}
+    try:
+        for frame in call_ash_ipc_stream('exec-command-auto', connection_id, command):
+            if frame.get('done'):
+                if frame.get('error') == 'not_found':
+                    return {'success': False, 'error': 'not_found', 'activeConnections': frame.get('activeConnections', 0)}
+                return {
+                    'success': frame.get('success'),
+                    # Exec channels return trimmed output; match that
+                    'output': ''.join(parts['stdout']).strip(),
+                    'error': ''.join(parts['stderr']).strip(),
+                    'exitCode': frame.get('exitCode'),
+                    'type': frame.get('type'),
+                }
+            stream = 'stderr' if frame.get('stream') == 'stderr' else 'stdout'
+            room = _EXEC_OUTPUT_MAX - sizes[stream]
+            if room <= 0:
+                continue  # Keep reading until done, but hold no more than the cap
+            chunk = frame.get('chunk', '')
+            if len(chunk) > room:
+                chunk = chunk[:room] + _OUTPUT_TRUNCATED
+            parts[stream].append(chunk)
+            sizes[stream] += len(chunk)
+    except IPCError as e:
+        if 'returned status 404' not in str(e):
+            raise
+        _logger.info("[ash_execute_command] IPC bridge has no streaming endpoint, using exec-command-auto")
+        _EXEC_STREAM_SUPPORTED = False
+        return None
+    
+    raise IPCError("IPC bridge stream ended before the command completed")
+
+
+# Set to False once the bridge reports it does not know 'exec-command-auto' (older ash versions)
+_EXEC_AUTO_SUPPORTED = True
+
+
+def _execute_auto(connection_id: str, command: str) -> Optional[Dict[str, Any]]:
+    """
+    Execute via the bridge's 'exec-command-auto' channel (type lookup + exec in one call).
+    
+    Returns None if the bridge does not support the channel.
+    """
+    global _EXEC_AUTO_SUPPORTED
+    if not _EXEC_AUTO_SUPPORTED:
+        return None
+    try:
+        return call_ash_ipc('exec-command-auto', connection_id, command)
+    except IPCError as e:
+        if 'Unknown IPC handler' not in str(e):
+            raise
+        _logger.info("[ash_execute_command] IPC bridge has no exec-command-auto, using list + routed exec")
+        _EXEC_AUTO_SUPPORTED = False
+        return None
+
+
+# Internal exec channel for each connection type
+_CHANNEL_MAP = {
+    'ssh': 'ssh-exec-command',
+    'telnet': 'telnet-exec-command',
+    'serial': 'serial-exec-command',
+    'local': 'local-exec-command'
+}
+
+
+def _execute_routed(connection_id: str, command: str) -> Optional[Dict[str, Any]]:
+    """Look up the connection type (cached) and execute on the matching channel. None if not found."""
+    conn_type = _resolve_conn_type(connection_id)
+    if not conn_type:
+        return None
+    
+    # Route to correct internal channel
+    ipc_channel = _CHANNEL_MAP.get(conn_type, 'ssh-exec-command')
+    _logger.debug("[ash_execute_command] Routing to %s (type=%s)", ipc_channel, conn_type)
+    
+    return call_ash_ipc(ipc_channel, connection_id, command)
 
 @register_tool('ash_execute_command')
 class UnifiedExecuteTool(BaseTool):
@@ -130,51 +765,63 @@ class UnifiedExecuteTool(BaseTool):
     }]
     
     def call(self, params: str, **kwargs) -> str:
-        import json5
-        
-        data = json5.loads(params)
+        data = _parse_params(params)
         connection_id = data.get('connection_id')
         command = data.get('command')
         
-        _logger.info(f"[ash_execute_command] Processing: id={connection_id}, cmd={command}")
+        _logger.debug("[ash_execute_command] Processing: id=%s, cmd=%s", connection_id, command)
+
+        if command and _CHANGES_CWD.search(command):
+            _CWD_CACHE.pop(connection_id, None)
+
+        cache_key = _result_cache_key(connection_id, command)
+        if cache_key is None:
+            # May change state that cached results describe
+            _invalidate_result_cache(connection_id)
+        else:
+            cached = _result_cache_get(cache_key)
+            if cached is not None:
+                _logger.debug("[ash_execute_command] Using cached result for %r", command)
+                cached['command'] = command
+                return _json_dumps(cached)
 
-        # 1. Internal Type Lookup (No AI Guessing)
         try:
-            list_result = call_ash_ipc('ssh-list-connections')
-            connections = list_result.get('connections', [])
-            target = next((c for c in connections if c.get('connectionId') == connection_id), None)
+            # 1. Resolve type + execute in one round-trip, streaming the output
+            #    (the bridge looks up the connection itself)
+            result = _execute_streamed(connection_id, command)
             
-            if not target:
+            # 2. Older bridges: one buffered exec-command-auto call, or else
+            #    internal type lookup + routed exec
+            if result is None:
+                result = _execute_auto(connection_id, command)
+            if result is None:
+                result = _execute_routed(connection_id, command)
+            
+            if result is None or result.get('error') == 'not_found':
+                if result and 'activeConnections' in result:
+                    active_count = result['activeConnections']
+                else:
+                    active_count = len(_CONN_LIST_CACHE[1]) if _CONN_LIST_CACHE else 0
                 return json.dumps({
                     "success": False, 
-                    "error": f"Connection ID {connection_id} not found. active connections: {len(connections)}"
+                    "error": f"Connection ID {connection_id} not found. active connections: {active_count}"
                 }, ensure_ascii=False)
             
-            conn_type = target.get('type', 'ssh') # Default to ssh if missing
-            
-            # 2. Route to correct internal channel
-            channel_map = {
-                'ssh': 'ssh-exec-command',
-                'telnet': 'telnet-exec-command',
-                'serial': 'serial-exec-command',
-                'local': 'local-exec-command'
-            }
-            
-            ipc_channel = channel_map.get(conn_type, 'ssh-exec-command')
-            _logger.info(f"[ash_execute_command] Routing to {ipc_channel} (type={conn_type})")
-            
-            # 3. Execute
-            result = call_ash_ipc(ipc_channel, connection_id, command)
+            if cache_key is not None and result.get('success') and result.get('exitCode') in (0, None):
+                _result_cache_put(cache_key, result)
             result['command'] = command
-            return json.dumps(result, ensure_ascii=False)
+            return _json_dumps(result)
 
         except Exception as e:
             error_msg = str(e)
+            # The cached type may be stale (connection closed or replaced)
+            if "not found" in error_msg.lower() or "connection" in error_msg.lower():
+                _invalidate_conn_cache(connection_id)
             # If user simply denied the request, it's not a system error - log as info without stack trace
             if "denied by user" in error_msg or "denied permission" in error_msg:
-                _logger.info(f"[ash_execute_command] Action denied by user: {error_msg}")
+                _logger.info("[ash_execute_command] Action denied by user: %s", error_msg)
             else:
-                _logger.error(f"[ash_execute_command] Error: {error_msg}", exc_info=True)
+                _logger.error("[ash_execute_command] Error: %s", error_msg, exc_info=True)
                 
             return json.dumps({"success": False, "error": error_msg}, ensure_ascii=False)
 
@@ -190,18 +837,25 @@ class ListConnectionsTool(BaseTool):
     parameters = []
     
     def call(self, params: str, **kwargs) -> str:
-        _logger.info("[ash_list_connections] Calling...")
+        _logger.debug("[ash_list_connections] Calling...")
+        cached = _LIST_RESULT_CACHE
+        ttl = _CONN_TTL_WITH_EVENTS if _ipc_events_connected.is_set() else _LIST_TTL
+        if cached and time.monotonic() - cached[0] < ttl:
+            _logger.debug("[ash_list_connections] Using cached result")
+            return cached[1]
         try:
             # Use the correct IPC channel name: 'ssh-list-connections' (now returns all connection types)
             result = call_ash_ipc('ssh-list-connections')
             connections = result.get('connections', [])
-            _logger.info(f"[ash_list_connections] Found {len(connections)} connections")
+            result_json = _json_dumps(result)
+            _cache_connections(connections, result_json)
+            _logger.debug("[ash_list_connections] Found %d connections", len(connections))
             # Log connection types for debugging
             for conn in connections:
-                _logger.debug(f"[ash_list_connections] Connection {conn.get('connectionId')}: type={conn.get('type')}, connected={conn.get('connected')}")
-            return json.dumps(result, ensure_ascii=False)
+                _logger.debug("[ash_list_connections] Connection %s: type=%s, connected=%s", conn.get('connectionId'), conn.get('type'), conn.get('connected'))
+            return result_json
         except Exception as e:
-            _logger.error(f"[ash_list_connections] Error: {str(e)}", exc_info=True)
+            _logger.error("[ash_list_connections] Error: %s", e, exc_info=True)
             raise
 
 @register_tool('ash_ask_user')
@@ -221,24 +875,92 @@ class AshAskUserTool(BaseTool):
     }]
     
     def call(self, params: str, **kwargs) -> str:
-        import json5
-        
-        data = json5.loads(params)
+        data = _parse_params(params)
         question = data.get('question')
         is_password = data.get('is_password', False)
         
-        _logger.info(f"[ash_ask_user] Asking user: {question} (is_password={is_password})")
+        _logger.debug("[ash_ask_user] Asking user: %s (is_password=%s)", question, is_password)
         
         try:
             # Call IPC bridge to show dialog to user
             result = call_ash_ipc('ask-user', question, is_password)
             
-            _logger.info(f"[ash_ask_user] User responded: {'(hidden)' if is_password else result}")
+            _logger.debug("[ash_ask_user] User responded: %s", '(hidden)' if is_password else result)
             return result
         except Exception as e:
-            _logger.error(f"[ash_ask_user] Error: {str(e)}", exc_info=True)
+            _logger.error("[ash_ask_user] Error: %s", e, exc_info=True)
             raise
 
+# In-process cache of recent web searches: {(query, max_results): (timestamp, json_str)}
+# Set ASH_DISABLE_SEARCH_CACHE=1 to always hit DuckDuckGo.
+_WEB_CACHE: "OrderedDict[Tuple[str, int], Tuple[float, str]]" = OrderedDict()
+_WEB_CACHE_MAX = 128
+_WEB_TTL = 300  # seconds
+_WEB_CACHE_ENABLED = os.getenv('ASH_DISABLE_SEARCH_CACHE') != '1'
+_WEB_CACHE_LOCK = threading.Lock()
+
+
+def _web_cache_get(key: Tuple[str, int]) -> Optional[str]:
+    with _WEB_CACHE_LOCK:
+        entry = _WEB_CACHE.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] >= _WEB_TTL:
+            del _WEB_CACHE[key]
+            return None
+        _WEB_CACHE.move_to_end(key)
+        return entry[1]
+
+
+def _web_cache_put(key: Tuple[str, int], value: str) -> None:
+    with _WEB_CACHE_LOCK:
+        _WEB_CACHE[key] = (time.monotonic(), value)
+        _WEB_CACHE.move_to_end(key)
+        while len(_WEB_CACHE) > _WEB_CACHE_MAX:
+            _WEB_CACHE.popitem(last=False)
+
+# Web search backend: 'ddgs' (duckduckgo_search package, default) or 'aiohttp'
+# (direct request to the DuckDuckGo HTML endpoint, parsed with selectolax).
+_WEB_BACKEND = os.getenv('ASH_WEB_BACKEND', 'ddgs').lower()
+_DDG_HTML_URL = 'https://html.duckduckgo.com/html/'
+
+
+def _ddg_result_url(href: Optional[str]) -> Optional[str]:
+    """Unwrap DuckDuckGo redirect links (//duckduckgo.com/l/?uddg=<target>&rut=...)."""
+    if href and 'uddg=' in href:
+        target = urllib.parse.parse_qs(urllib.parse.urlparse(href).query).get('uddg')
+        if target:
+            return target[0]
+    return href
+
+
+async def _web_search_async(query: str, max_results: int) -> list:
+    """Search DuckDuckGo's HTML endpoint with aiohttp and return [{title, href, body}, ...]."""
+    from selectolax.parser import HTMLParser
+
+    headers = {'User-Agent': 'Mozilla/5.0 (compatible; ash-terminal)'}
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=20), headers=headers) as session:
+        async with session.post(_DDG_HTML_URL, data={'q': query}) as response:
+            response.raise_for_status()
+            html = await response.text()
+
+    results = []
+    for node in HTMLParser(html).css('div.result'):
+        if 'result--ad' in (node.attributes.get('class') or ''):
+            continue
+        link = node.css_first('a.result__a')
+        if link is None:
+            continue
+        snippet = node.css_first('.result__snippet')
+        results.append({
+            'title': link.text(strip=True),
+            'href': _ddg_result_url(link.attributes.get('href')),
+            'body': snippet.text(strip=True) if snippet is not None else '',
+        })
+        if len(results) >= max_results:
+            break
+    return results
+
 @register_tool('ash_web_search')
 class WebSearchTool(BaseTool):
     """Perform a web search using DuckDuckGo."""
@@ -256,32 +978,45 @@ class WebSearchTool(BaseTool):
     }]
     
     def call(self, params: str, **kwargs) -> str:
-        import json5
-        from duckduckgo_search import DDGS
-        
-        data = json5.loads(params)
+        data = _parse_params(params)
         query = data.get('query')
         max_results = data.get('max_results', 5)
         
-        _logger.info(f"[ash_web_search] Searching for: {query} (max={max_results})")
+        _logger.debug("[ash_web_search] Searching for: %s (max=%s)", query, max_results)
+        
+        cache_key = (str(query or '').strip().lower(), max_results)
+        if _WEB_CACHE_ENABLED:
+            cached = _web_cache_get(cache_key)
+            if cached is not None:
+                _logger.debug("[ash_web_search] Returning cached results for: %s", query)
+                return cached
         
         try:
-            results = []
-            with DDGS() as ddgs:
-                # Use 'text' backend for standard web search
-                # max_results defaults to 5 if not specified
-                search_gen = ddgs.text(query, max_results=max_results)
-                for r in search_gen:
-                    results.append({
-                        'title': r.get('title'),
-                        'href': r.get('href'),
-                        'body': r.get('body'),
-                    })
+            if _WEB_BACKEND == 'aiohttp':
+                # Tools run on Qwen-Agent's worker thread, which has no event loop of its own
+                results = asyncio.run(_web_search_async(query, max_results))
+            else:
+                from duckduckgo_search import DDGS
+                
+                results = []
+                with DDGS() as ddgs:
+                    # Use 'text' backend for standard web search
+                    # max_results defaults to 5 if not specified
+                    search_gen = ddgs.text(query, max_results=max_results)
+                    for r in search_gen:
+                        results.append({
+                            'title': r.get('title'),
+                            'href': r.get('href'),
+                            'body': r.get('body'),
+                        })
             
-            _logger.info(f"[ash_web_search] Found {len(results)} results")
-            return json.dumps(results, ensure_ascii=False)
+            _logger.debug("[ash_web_search] Found %d results", len(results))
+            results_json = _json_dumps(results)
+            if _WEB_CACHE_ENABLED:
+                _web_cache_put(cache_key, results_json)
+            return results_json
         except Exception as e:
-            _logger.error(f"[ash_web_search] Error: {str(e)}", exc_info=True)
+            _logger.error("[ash_web_search] Error: %s", e, exc_info=True)
             return json.dumps({
                 "error": str(e),
                 "message": "Failed to perform web search. Please try again with a different query."
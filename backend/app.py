@@ -10,10 +10,23 @@ on remote servers or serial devices.
 Usage:
     Development: uv run uvicorn app:app --host 127.0.0.1 --port 54111 --reload
     Production: uvicorn app:app --host 127.0.0.1 --port 54111
+
+Concurrent agent requests each run in their own worker thread, so the LLM server
+sees them as parallel requests. Batching them is up to the server: start Ollama
+with OLLAMA_NUM_PARALLEL > 1 (vLLM batches continuously by default).
 """
 
+import asyncio
+import functools
+import hashlib
 import os
+import re
 import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # Set Qwen-Agent workspace to use our data directory BEFORE any imports
@@ -35,18 +48,24 @@ os.environ['QWEN_AGENT_DEFAULT_WORKSPACE'] = qwen_workspace
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, field_validator
 from qwen_agent.agents import Assistant
+from qwen_agent.llm.oai import TextChatAtOAI
+from qwen_agent.llm.schema import FUNCTION, Message
+from qwen_agent.settings import MAX_LLM_CALL_PER_RUN
+import httpx
+import openai
 import uvicorn
 import json
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from datetime import datetime
 
-# Configure logging - use standard format
+# Configure logging - use standard format. Per-request details are logged at INFO;
+# set ASH_LOG_LEVEL=INFO (or DEBUG) to see them.
 logging.basicConfig(
-    level=logging.INFO,
+    level=getattr(logging, os.getenv('ASH_LOG_LEVEL', 'WARNING').upper(), logging.WARNING),
     format='%(levelname)s:%(name)s: %(message)s'
 )
 logger = logging.getLogger('app')
@@ -54,7 +73,45 @@ logger = logging.getLogger('app')
 # Import agent tools to register them
 import agent_tools
 
-app = FastAPI(title="Ash Terminal Backend", version="1.0.0")
+
+
+def _warm_up_llm():
+    """Send a one-token request so the LLM server loads the default model before the first task."""
+    started = time.monotonic()
+    try:
+        client = _get_llm_client(model_config['model_server'], model_config['api_key'])
+        client.chat.completions.create(
+            model=model_config['model'],
+            messages=[{"role": "user", "content": "ping"}],
+            max_tokens=1,
+            extra_body={"keep_alive": os.getenv('ASH_WARMUP_KEEP_ALIVE', '30m')},  # Ollama: keep the model loaded
+            timeout=120,
+        )
+        logger.info("LLM warm-up for %s done in %.1fs", model_config['model'], time.monotonic() - started)
+    except Exception as e:
+        logger.warning("LLM warm-up failed (continuing): %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Opt-in: the frontend usually sends its own LLM config, which may not be model_config
+    warmup = None
+    if os.getenv('ASH_WARMUP', '0') == '1':
+        warmup = asyncio.create_task(asyncio.to_thread(_warm_up_llm))
+    yield
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
+    # Release pooled IPC bridge and LLM server connections
+    await agent_tools.close_ash_ipc_async()
+    _close_llm_clients()
+    # Pumps of still-open streams stop at their next frame once the client is gone
+    _STREAM_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+
+
+# ORJSONResponse needs orjson, which stays optional (see agent_tools)
+_JSONResponse = ORJSONResponse if agent_tools.orjson is not None else JSONResponse
+
+app = FastAPI(title="Ash Terminal Backend", version="1.0.0", lifespan=lifespan, default_response_class=_JSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -63,6 +120,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the renderer reuse a preflight for as long as Chromium allows (2h)
+    # instead of re-sending OPTIONS every 10 minutes
+    max_age=7200,
 )
 
 # --- Agent Configuration ---
@@ -74,7 +134,9 @@ model_config = {
     'api_key': os.getenv('QWEN_API_KEY', 'ollama'),
     'generate_cfg': {
         'temperature': float(os.getenv('QWEN_TEMPERATURE', '0.2')),
-        'max_tokens': int(os.getenv('QWEN_MAX_TOKENS', '4000')),
+        # Most ReAct turns are a short reply plus a tool call; a smaller budget
+        # means less KV cache reserved per request on the LLM server
+        'max_tokens': int(os.getenv('QWEN_MAX_TOKENS', '1024')),
         'top_p': float(os.getenv('QWEN_TOP_P', '0.9')),
     }
 }
@@ -87,13 +149,279 @@ ash_tool_names = [
     'ash_web_search',
 ]
 
-from prompts.system_prompt import build_system_prompt
+from prompts.system_prompt import STATIC_SYSTEM_PROMPT, build_connection_prompt, build_system_prompt
 
 # Default system prompt (will be customized per request if connection_id is provided)
 ash_system_prompt = build_system_prompt()
 
-# Default system prompt (will be customized per request if connection_id is provided)
-ash_system_prompt = build_system_prompt()
+
+# --- Agent ---
+
+# Tool calls are I/O bound (SSH/telnet round-trips through the IPC bridge)
+_TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='ash-tool')
+
+
+# One OpenAI client (and httpx connection pool) per LLM endpoint, shared by all
+# requests. Qwen-Agent's TextChatAtOAI otherwise builds a new client per LLM call.
+_LLM_CLIENTS: "OrderedDict[Tuple[str, str], openai.OpenAI]" = OrderedDict()
+_LLM_CLIENTS_LOCK = threading.Lock()
+# LRU bound: every distinct endpoint/API key from the frontend would otherwise pin a pool forever
+_LLM_CLIENTS_MAX = max(1, int(os.getenv('ASH_LLM_CLIENT_CACHE', '16')))
+# httpx drops idle connections after 5s by default, which is shorter than the pause
+# between two turns; keep them long enough for the next turn to reuse the socket.
+# (httpx discards connections the server has closed before reusing them.)
+_LLM_HTTP_LIMITS = httpx.Limits(
+    max_connections=64,
+    max_keepalive_connections=32,
+    keepalive_expiry=float(os.getenv('ASH_LLM_KEEPALIVE_SECONDS', '60')),
+)
+_OAI_EXTRA_BODY_PARAMS = ('top_k', 'repetition_penalty')
+
+
+def _get_llm_client(base_url: str, api_key: str) -> openai.OpenAI:
+    key = (base_url, api_key)
+    with _LLM_CLIENTS_LOCK:
+        client = _LLM_CLIENTS.get(key)
+        if client is not None:
+            _LLM_CLIENTS.move_to_end(key)
+            return client
+        client = openai.OpenAI(
+            base_url=base_url or None,
+            api_key=api_key,
+            http_client=httpx.Client(limits=_LLM_HTTP_LIMITS, timeout=openai.DEFAULT_TIMEOUT),
+        )
+        _LLM_CLIENTS[key] = client
+        while len(_LLM_CLIENTS) > _LLM_CLIENTS_MAX:
+            # Not closed here: a running request may still be streaming through it.
+            # Its sockets are freed once it is garbage collected.
+            _LLM_CLIENTS.popitem(last=False)
+    return client
+
+
+def _close_llm_clients():
+    with _LLM_CLIENTS_LOCK:
+        for client in _LLM_CLIENTS.values():
+            client.close()
+        _LLM_CLIENTS.clear()
+
+
+def _use_shared_llm_client(llm, llm_cfg: Dict[str, Any]):
+    """Point a Qwen-Agent OpenAI-compatible model at the shared client for its endpoint.
+
+    Only the client is swapped: the endpoint, key and request arguments stay what
+    TextChatAtOAI would send. Qwen-Agent versions without its private create hooks
+    are left to build their own clients.
+    """
+    if not isinstance(llm, TextChatAtOAI) or openai.__version__.startswith('0.'):
+        return
+    if not (callable(getattr(llm, '_chat_complete_create', None))
+            and callable(getattr(llm, '_complete_create', None))):
+        return
+    api_base = (llm_cfg.get('api_base') or llm_cfg.get('base_url') or llm_cfg.get('model_server') or '').strip()
+    api_key = (llm_cfg.get('api_key') or os.getenv('OPENAI_API_KEY') or 'EMPTY').strip()
+    client = _get_llm_client(api_base, api_key)
+
+    def _prepare(kwargs):
+        # Same argument mapping as TextChatAtOAI: OpenAI API v1 takes these via extra_body
+        if any(k in kwargs for k in _OAI_EXTRA_BODY_PARAMS):
+            kwargs['extra_body'] = dict(kwargs.get('extra_body', {}))
+            for k in _OAI_EXTRA_BODY_PARAMS:
+                if k in kwargs:
+                    kwargs['extra_body'][k] = kwargs.pop(k)
+        if 'request_timeout' in kwargs:
+            kwargs['timeout'] = kwargs.pop('request_timeout')
+        return kwargs
+
+    llm._chat_complete_create = lambda *args, **kwargs: client.chat.completions.create(*args, **_prepare(kwargs))
+    llm._complete_create = lambda *args, **kwargs: client.completions.create(*args, **_prepare(kwargs))
+
+
+# Tools that prompt the user: the frontend shows one question at a time
+_SEQUENTIAL_TOOLS = frozenset({'ash_ask_user'})
+
+
+def _tool_lane(tool_name: str, tool_args) -> Optional[Tuple[str, str]]:
+    """Key of the calls this one must not overlap with, or None if it may run alongside any.
+
+    Serial and telnet exec read the reply from a listener on the shared port or socket,
+    so two commands on one connection would see each other's output.
+    """
+    if tool_name in _SEQUENTIAL_TOOLS:
+        return ('tool', tool_name)
+    try:
+        args = tool_args if isinstance(tool_args, dict) else agent_tools._parse_params(tool_args)
+    except Exception:
+        return None
+    connection_id = args.get('connection_id') if isinstance(args, dict) else None
+    return ('connection', str(connection_id)) if connection_id else None
+
+
+class ParallelToolAssistant(Assistant):
+    """Assistant that runs the tool calls of a single LLM turn concurrently.
+
+    Same loop as Qwen-Agent's FnCallAgent._run, except that when one turn emits
+    several function calls they are executed in parallel, so the turn takes as
+    long as the slowest call instead of the sum. Calls on the same connection,
+    and user prompts, still run one after another (see _tool_lane). Results are
+    appended in call order so each function message follows its call.
+    """
+
+    def _run(self, messages: List[Message], lang: str = 'en', knowledge: str = '', **kwargs) -> Iterator[List[Message]]:
+        messages = self._prepend_knowledge_prompt(messages=messages, lang=lang, knowledge=knowledge, **kwargs)
+        num_llm_calls_available = MAX_LLM_CALL_PER_RUN
+        response = []
+        while num_llm_calls_available > 0:
+            num_llm_calls_available -= 1
+
+            extra_generate_cfg = {'lang': lang}
+            if kwargs.get('seed') is not None:
+                extra_generate_cfg['seed'] = kwargs['seed']
+            output_stream = self._call_llm(messages=messages,
+                                           functions=[func.function for func in self.function_map.values()],
+                                           extra_generate_cfg=extra_generate_cfg)
+            output: List[Message] = []
+            for output in output_stream:
+                if output:
+                    yield response + output
+            if not output:
+                break
+            response.extend(output)
+            messages.extend(output)
+
+            calls = []
+            for out in output:
+                use_tool, tool_name, tool_args, _ = self._detect_tool(out)
+                if use_tool:
+                    calls.append((out, tool_name, tool_args))
+            if not calls:
+                break
+
+            # Calls sharing a lane run in order on one worker; lanes run concurrently
+            lanes: Dict[Any, List[int]] = {}
+            for i, (_, tool_name, tool_args) in enumerate(calls):
+                lanes.setdefault(_tool_lane(tool_name, tool_args) or ('call', i), []).append(i)
+            if len(lanes) == 1:
+                lane_futures = None
+            else:
+                logger.info("Running %d tool calls in %d concurrent lanes", len(calls), len(lanes))
+                call_messages = list(messages)  # messages keeps growing below while the calls run
+
+                lane_futures = [Future() for _ in calls]
+
+                def run_lane(indices):
+                    for i in indices:
+                        try:
+                            lane_futures[i].set_result(self._call_tool(calls[i][1], calls[i][2], messages=call_messages, **kwargs))
+                        except BaseException as e:
+                            lane_futures[i].set_exception(e)
+
+                for indices in lanes.values():
+                    _TOOL_EXECUTOR.submit(run_lane, indices)
+            for i, (out, tool_name, tool_args) in enumerate(calls):
+                if lane_futures is None:
+                    tool_result = self._call_tool(tool_name, tool_args, messages=messages, **kwargs)
+                else:
+                    tool_result = lane_futures[i].result()
+                fn_msg = Message(role=FUNCTION,
+                                 name=tool_name,
+                                 content=tool_result,
+                                 extra={'function_id': out.extra.get('function_id', '1')})
+                messages.append(fn_msg)
+                response.append(fn_msg)
+                yield response
+        yield response
+
+
+def _build_assistant(llm_cfg: Dict[str, Any], system_prompt: str, tools: List[str]) -> ParallelToolAssistant:
+    assistant = ParallelToolAssistant(
+        llm=llm_cfg,
+        system_message=system_prompt,
+        function_list=tools,
+    )
+    _use_shared_llm_client(assistant.llm, llm_cfg)
+    return assistant
+
+
+# Upper bound for a per-request max_tokens from the frontend
+_MAX_TOKENS_CAP = int(os.getenv('QWEN_MAX_TOKENS_CAP', '4096'))
+
+
+@functools.lru_cache(maxsize=64)
+def _compose_llm_config(provider: str, base_url: Optional[str], api_key: Optional[str], model: Optional[str],
+                        temperature: Optional[float], max_tokens: Optional[int]) -> Dict[str, Any]:
+    """Build the Qwen-Agent LLM config for a frontend LLMConfig.
+
+    The returned dict is shared between requests. Callers take a shallow copy
+    (Qwen-Agent's get_chat_model writes model_type into the config it is given);
+    generate_cfg is copied by Qwen-Agent and must not be mutated.
+    """
+    llm_config_data = {
+        'model': model or model_config['model'],
+        'model_server': base_url or model_config['model_server'],
+        'api_key': api_key or model_config['api_key'],
+        'generate_cfg': {
+            'temperature': temperature if temperature is not None else model_config['generate_cfg']['temperature'],
+            'max_tokens': min(max_tokens, _MAX_TOKENS_CAP) if max_tokens is not None else model_config['generate_cfg']['max_tokens'],
+            'top_p': model_config['generate_cfg']['top_p'],
+        }
+    }
+
+    # Convert provider-specific URLs
+    if provider == 'ollama':
+        base_url = base_url or 'http://localhost:11434'
+        if not base_url.endswith('/v1'):
+            base_url = base_url.rstrip('/') + '/v1'
+        llm_config_data['model_server'] = base_url
+        llm_config_data['api_key'] = 'ollama'
+    elif provider == 'ash':
+        # Ash backend proxies to Ollama, so use the same format
+        base_url = base_url or 'https://ash.toktoktalk.com/v1'
+        if not base_url.endswith('/v1'):
+            base_url = base_url.rstrip('/') + '/v1'
+        llm_config_data['model_server'] = base_url
+        # Use the API key from request, or default to 'ollama' if not provided
+        api_key = api_key or 'ollama'
+        llm_config_data['api_key'] = api_key
+        # Qwen-Agent may use api_key as Authorization header, but ash server needs X-API-Key
+        # Try to add custom headers if Qwen-Agent supports it
+        # Note: This depends on Qwen-Agent's implementation
+        if 'headers' not in llm_config_data:
+            llm_config_data['headers'] = {}
+        llm_config_data['headers']['X-API-Key'] = api_key
+    elif provider == 'openai':
+        llm_config_data['model_server'] = base_url or 'https://api.openai.com/v1'
+    elif provider == 'anthropic':
+        base_url = base_url or 'https://api.anthropic.com'
+        if not base_url.endswith('/v1'):
+            if '/v1' not in base_url:
+                base_url = base_url.rstrip('/') + '/v1'
+        llm_config_data['model_server'] = base_url
+
+    return llm_config_data
+
+
+# Tool outputs from user turns older than this are replaced with a one-line stub.
+# The frontend already caps each stored output (~10KB), but every later turn still
+# re-sends (and the LLM re-prefills) all of them. The stubbing depends only on the
+# history itself, so the prompt prefix only changes when an output ages out.
+_HISTORY_TOOL_RESULT_TURNS = int(os.getenv('ASH_HISTORY_TOOL_RESULT_TURNS', '3'))
+_HISTORY_TOOL_RESULT_STUB_MIN = 1024  # Shorter outputs are cheaper to keep than to stub
+
+
+def _stub_old_tool_results(messages: List[Dict[str, Any]]):
+    """Replace large function results older than the last N user turns, in place."""
+    if _HISTORY_TOOL_RESULT_TURNS <= 0:
+        return
+    user_turns = 0
+    for i in range(len(messages) - 1, -1, -1):
+        msg = messages[i]
+        role = msg.get('role')
+        if role == 'user':
+            user_turns += 1
+        elif role == 'function' and user_turns >= _HISTORY_TOOL_RESULT_TURNS:
+            content = msg.get('content')
+            if isinstance(content, str) and len(content) > _HISTORY_TOOL_RESULT_STUB_MIN:
+                messages[i] = {**msg, 'content': f"[Earlier {msg.get('name') or 'tool'} output omitted ({len(content)} chars)]"}
 
 
 # --- Pydantic Models ---
@@ -106,27 +434,364 @@ class LLMConfig(BaseModel):
     temperature: Optional[float] = None
     max_tokens: Optional[int] = None
 
+# Upper bound on posted history: every message is copied and tokenized on each request
+_MAX_HISTORY_MESSAGES = 500
+
 class TaskRequest(BaseModel):
     message: str
-    conversation_history: Optional[List[Dict[str, str]]] = None
+    # Plain list: the history comes from our own frontend, and validating every
+    # message's fields is real CPU on long conversations (Qwen-Agent checks roles anyway)
+    conversation_history: Optional[list] = None
     connection_id: Optional[str] = None  # Active SSH/Serial connection ID
     llm_config: Optional[LLMConfig] = None  # LLM configuration from frontend
 
+    @field_validator('conversation_history')
+    @classmethod
+    def _history_of_messages(cls, v):
+        if v is None:
+            return v
+        if len(v) > _MAX_HISTORY_MESSAGES:
+            raise ValueError(f'conversation_history must have at most {_MAX_HISTORY_MESSAGES} messages')
+        if not all(isinstance(msg, dict) for msg in v):
+            raise ValueError('conversation_history must be a list of message objects')
+        return v
+
 class HealthResponse(BaseModel):
     status: str
     backend_version: str
     timestamp: str
 
+# --- Streaming helpers ---
+
+_SSE_DONE = b"data: [DONE]\n\n"
+
+
+def _sse_frame(obj: dict) -> bytes:
+    """Encode one SSE data frame as UTF-8 bytes (orjson when available)."""
+    # One join copies the payload once; chained + would copy it twice
+    return b"".join((b"data: ", agent_tools._json_dumps_bytes(obj), b"\n\n"))
+
+
+def _utf8_len(text: str) -> int:
+    """UTF-8 size of text without encoding it when it is pure ASCII (the common case)."""
+    return len(text) if text.isascii() else len(text.encode('utf-8'))
+
+
+def _truncate_utf8(text: str, max_bytes: int) -> str:
+    """Cut text to at most max_bytes of UTF-8 without splitting a character."""
+    # No character is shorter than one byte, so only the first max_bytes can survive
+    head = text[:max_bytes]
+    if head.isascii():
+        return head
+    # 'ignore' drops the partial character the byte cut may leave at the end
+    return head.encode('utf-8')[:max_bytes].decode('utf-8', 'ignore')
+
+
+# Bytes JSON string escaping adds per character: \" \\ \n ... take one more, other
+# control characters become \u00XX. Everything else is written as plain UTF-8.
+_JSON_ESCAPE_EXTRA = {chr(c): 5 for c in range(0x20)}
+_JSON_ESCAPE_EXTRA.update({'"': 1, '\\': 1, '\b': 1, '\f': 1, '\n': 1, '\r': 1, '\t': 1})
+
+
+def _json_str_len(text: str, utf8_len: int) -> int:
+    """Upper bound on the size of text encoded as a JSON string, given its UTF-8 size."""
+    return utf8_len + 2 + sum(extra * text.count(ch) for ch, extra in _JSON_ESCAPE_EXTRA.items())
+
+
+# SSE framing, keys, tool name, success and exitCode of a tool_result frame
+_TOOL_RESULT_FRAME_OVERHEAD = 256
+
+
+def _tool_result_size_bound(command, stdout, stdout_size: int, stderr, stderr_size: int, limit: int) -> int:
+    """Upper bound on the size of a tool_result SSE frame carrying this output.
+
+    Escapes are only counted when the output could fit in `limit` at all.
+    """
+    raw_size = stdout_size + stderr_size
+    if raw_size >= limit:
+        return _TOOL_RESULT_FRAME_OVERHEAD + raw_size
+    command_size = _json_str_len(command, _utf8_len(command)) if isinstance(command, str) else 4  # null
+    return (_TOOL_RESULT_FRAME_OVERHEAD + command_size
+            + (_json_str_len(stdout, stdout_size) if isinstance(stdout, str) else stdout_size)
+            + (_json_str_len(stderr, stderr_size) if isinstance(stderr, str) else stderr_size))
+
+
+# content_chunk is emitted once per streamed delta; only the text needs encoding
+_CONTENT_CHUNK_PREFIX = b'data: {"type":"content_chunk","content":'
+_SSE_OBJECT_SUFFIX = b'}\n\n'
+
+
+def _content_chunk_frame(text: str) -> bytes:
+    """Equivalent to _sse_frame({'type': 'content_chunk', 'content': text})."""
+    return b"".join((_CONTENT_CHUNK_PREFIX, agent_tools._json_dumps_bytes(text), _SSE_OBJECT_SUFFIX))
+
+
+class _ContentDelta(str):
+    """Assistant text yielded by the agent generator in place of a content_chunk frame.
+
+    _iterate_in_thread merges consecutive deltas into one content_chunk event.
+    """
+
+
+# Up to this many chars are merged into one content_chunk; even fully escaped as
+# JSON (6 bytes per char) the frame stays under the 32KB per-event limit.
+_CONTENT_MERGE_MAX_CHARS = 4096
+
+
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "Access-Control-Allow-Origin": "*",
+    # Disable any potential response size limits at HTTP level
+    "X-Accel-Buffering": "no",  # Disable nginx buffering if present
+}
+
+_STREAM_END = object()
+
+# Frames produced within this window are written in one send() (fast decode emits
+# a frame per token); 20ms is well below what a user notices in the terminal.
+_SSE_COALESCE_WINDOW = float(os.getenv('ASH_SSE_COALESCE_MS', '20')) / 1000
+_SSE_COALESCE_MAX_BYTES = 16 * 1024
+_SSE_QUEUE_MAX = 64
+
+# Each open stream holds one pump thread for its whole life. They get their own pool
+# so long-lived streams cannot use up the default executor that asyncio.to_thread
+# (IPC, assistant setup, ...) runs on; streams beyond this many wait for a free pump.
+_SSE_MAX_STREAMS = max(1, int(os.getenv('ASH_MAX_STREAMS', '64')))
+_STREAM_EXECUTOR = ThreadPoolExecutor(max_workers=_SSE_MAX_STREAMS, thread_name_prefix='ash-stream')
+
+# Comment frame sent while a long tool call produces nothing, so idle-timeout
+# proxies keep the stream open (the client ignores lines not starting with "data: ")
+_SSE_PING = b": ping\n\n"
+_SSE_PING_INTERVAL = 15.0
+
+
+async def _iterate_in_thread(sync_gen):
+    """Drive a blocking generator in one worker thread and yield its items asynchronously.
+
+    Qwen-Agent's assistant.run() is synchronous (LLM HTTP calls and tool calls block).
+    Handing StreamingResponse a plain generator makes Starlette dispatch every
+    next() to the threadpool; running the whole generator in a single thread and
+    passing items back through a queue keeps the event loop free while avoiding a
+    thread hop per SSE frame. At most _SSE_QUEUE_MAX frames are buffered, so a
+    slow client pauses the agent instead of growing the queue. Frames arriving
+    within _SSE_COALESCE_WINDOW are joined into one chunk; they stay separate SSE
+    events for the client, except that consecutive _ContentDelta texts are merged
+    into one content_chunk event. If the client disconnects, the generator is
+    closed so the agent loop stops at the next frame.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    slots = threading.Semaphore(_SSE_QUEUE_MAX)
+
+    def reserve_slot() -> bool:
+        while not slots.acquire(timeout=0.5):
+            if stop.is_set():
+                return False
+        return True
+
+    def pump():
+        try:
+            for item in sync_gen:
+                if not reserve_slot():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+                if stop.is_set():
+                    break
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            try:
+                sync_gen.close()
+            except RuntimeError:
+                # The generator's finally block yields the final [DONE] frame
+                pass
+            loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
+
+    loop.run_in_executor(_STREAM_EXECUTOR, pump)
+    try:
+        pending = None
+        while True:
+            if pending is not None:
+                item, pending = pending, None
+            else:
+                try:
+                    item = await asyncio.wait_for(queue.get(), _SSE_PING_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield _SSE_PING
+                    continue
+            if item is _STREAM_END:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            slots.release()
+            if _SSE_COALESCE_WINDOW <= 0:
+                yield _content_chunk_frame(item) if isinstance(item, _ContentDelta) else item
+                continue
+            # Frames (bytes) are concatenated; runs of assistant text deltas become
+            # one content_chunk event
+            batch = []
+            text = []
+            text_len = 0
+            size = 0
+            deadline = loop.time() + _SSE_COALESCE_WINDOW
+            while True:
+                if isinstance(item, _ContentDelta):
+                    if text_len + len(item) > _CONTENT_MERGE_MAX_CHARS:
+                        batch.append(_content_chunk_frame(''.join(text)))
+                        text, text_len = [], 0
+                    text.append(item)
+                    text_len += len(item)
+                    size += len(item)
+                else:
+                    if text:
+                        batch.append(_content_chunk_frame(''.join(text)))
+                        text, text_len = [], 0
+                    batch.append(item)
+                    size += len(item)
+                if size >= _SSE_COALESCE_MAX_BYTES:
+                    break
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STREAM_END or isinstance(item, BaseException):
+                    pending = item
+                    break
+                slots.release()
+            if text:
+                batch.append(_content_chunk_frame(''.join(text)))
+            yield batch[0] if len(batch) == 1 else b"".join(batch)
+    finally:
+        # Client went away (or we are done): let the worker stop at the next item
+        stop.set()
+
+
+# --- Response cache ---
+
+# Recent agent runs that finished without calling any tools, replayed as-is when the
+# same model/prompt/conversation comes in again. Runs that used tools are never cached
+# because their results depend on live connection state.
+# Opt-in with ASH_RESPONSE_CACHE=1: a user regenerating a prompt otherwise expects a
+# fresh answer. Conversations that already contain tool calls or results are never
+# looked up, since their answer depends on live device output.
+_RESPONSE_CACHE: "OrderedDict[str, Tuple[float, List[bytes]]]" = OrderedDict()
+_RESPONSE_CACHE_MAX = 128
+_RESPONSE_CACHE_TTL = 600  # seconds
+_RESPONSE_CACHE_MAX_TEMPERATURE = 0.2  # Sampled answers above this are not worth replaying
+_RESPONSE_CACHE_ENABLED = os.getenv('ASH_RESPONSE_CACHE', '0') == '1'
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+
+def _response_cache_key(llm_cfg: dict, system_prompt: str, tools: List[str], messages: List[dict]) -> str:
+    key_data = {
+        'model': llm_cfg.get('model'),
+        'model_server': llm_cfg.get('model_server'),
+        'generate_cfg': llm_cfg.get('generate_cfg'),
+        'system': system_prompt,
+        'tools': tools,
+        'messages': messages,
+    }
+    if agent_tools.orjson is not None:
+        encoded = agent_tools.orjson.dumps(key_data, option=agent_tools.orjson.OPT_SORT_KEYS)
+    else:
+        encoded = json.dumps(key_data, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.blake2b(encoded).hexdigest()
+
+
+def _response_cache_get(key: str) -> Optional[List[bytes]]:
+    with _RESPONSE_CACHE_LOCK:
+        entry = _RESPONSE_CACHE.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > _RESPONSE_CACHE_TTL:
+            del _RESPONSE_CACHE[key]
+            return None
+        _RESPONSE_CACHE.move_to_end(key)
+        return entry[1]
+
+
+def _response_cache_put(key: str, frames: List[bytes]) -> None:
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE[key] = (time.monotonic(), frames)
+        _RESPONSE_CACHE.move_to_end(key)
+        while len(_RESPONSE_CACHE) > _RESPONSE_CACHE_MAX:
+            _RESPONSE_CACHE.popitem(last=False)
+
+
+def _has_tool_messages(messages: List[dict]) -> bool:
+    return any(msg.get('role') in ('function', 'tool') or msg.get('function_call') for msg in messages)
+
+
+def _record_frames(frames_gen, key: str, run_state: dict):
+    """Pass SSE frames through, storing them in the response cache if the run qualifies."""
+    frames = []
+    for frame in frames_gen:
+        frames.append(_content_chunk_frame(frame) if isinstance(frame, _ContentDelta) else frame)
+        yield frame
+    if run_state.get('completed') and not run_state.get('used_tools'):
+        _response_cache_put(key, frames)
+
+
+# Opt-in (ASH_DIRECT_COMMANDS=1): a message that is nothing but one of these read-only
+# commands is run directly on the bound connection, skipping the LLM round-trip.
+_DIRECT_COMMANDS_ENABLED = os.getenv('ASH_DIRECT_COMMANDS', '0') == '1'
+_DIRECT_COMMAND = re.compile(
+    r'pwd|whoami|hostname|id|uptime|date|uname(?: -[a-z]+)?|ls(?: -[A-Za-z]+)?|df(?: -[hT]+)?|free(?: -[hmg])?'
+)
+_DIRECT_RESULT_MAX_SIZE = 32 * 1024  # Larger outputs need chunking; leave those to the agent
+
+
+def _direct_command(message: str) -> Optional[str]:
+    command = ' '.join(message.split())
+    return command if _DIRECT_COMMAND.fullmatch(command) else None
+
+
+def _direct_command_frames(connection_id: str, command: str) -> Optional[List[bytes]]:
+    """Run command through the execute tool and return its SSE frames.
+
+    Returns None when the command failed (or the connection is gone) or its output is
+    too large, so the request goes to the agent instead.
+    """
+    tool_args = agent_tools._json_dumps({'connection_id': connection_id, 'command': command})
+    result = agent_tools._json_loads(agent_tools.UnifiedExecuteTool().call(tool_args))
+    if not result.get('success'):
+        return None
+    result_frame = _sse_frame({
+        'type': 'tool_result',
+        'name': 'ash_execute_command',
+        'command': command,
+        'success': result.get('success', False),
+        'exitCode': result.get('exitCode'),
+        'stdout': result.get('output', ''),
+        'stderr': result.get('error', ''),
+    })
+    if len(result_frame) >= _DIRECT_RESULT_MAX_SIZE:
+        return None
+    return [
+        _sse_frame({'type': 'tool_call', 'name': 'ash_execute_command', 'args': tool_args, 'command': command}),
+        result_frame,
+        _content_chunk_frame(f"Ran `{command}` on the active connection."),
+        _sse_frame({'type': 'done', 'timestamp': datetime.now().isoformat()}),
+        _SSE_DONE,
+    ]
+
+
 # --- API Endpoints ---
 
-@app.get("/health", response_model=HealthResponse)
+@app.get("/health", response_class=_JSONResponse, responses={200: {"model": HealthResponse}})
 async def health_check():
     """Health check endpoint."""
-    return HealthResponse(
-        status="healthy",
-        backend_version="1.0.0",
-        timestamp=datetime.now().isoformat()
-    )
+    # Returned as a response directly so FastAPI skips response-model validation
+    return _JSONResponse({
+        "status": "healthy",
+        "backend_version": "1.0.0",
+        "timestamp": datetime.now().isoformat(),
+    })
 
 @app.post("/agent/execute/stream")
 async def execute_task_stream(request: TaskRequest):
@@ -135,44 +800,54 @@ async def execute_task_stream(request: TaskRequest):
     
     Returns Server-Sent Events (SSE) stream for real-time updates.
     """
-    logger.info(f"Streaming task request: {request.message[:100]}...")
-    logger.info(f"Connection ID provided: {request.connection_id}")
+    logger.info("Streaming task request: %s...", request.message[:100])
+    logger.info("Connection ID provided: %s", request.connection_id)
+    
+    direct_command = _direct_command(request.message) if _DIRECT_COMMANDS_ENABLED and request.connection_id else None
+    if direct_command:
+        try:
+            frames = await asyncio.to_thread(_direct_command_frames, request.connection_id, direct_command)
+        except Exception as e:
+            logger.warning("Direct command failed, falling back to the agent: %s", e)
+            frames = None
+        if frames is not None:
+            logger.info("Ran %r directly (no LLM call)", direct_command)
+            return Response(b"".join(frames), media_type="text/event-stream", headers=_SSE_HEADERS)
     
     # Get current working directory if connection_id is provided
     current_directory = None
     if request.connection_id:
+        current_directory = agent_tools._cached_cwd(request.connection_id)
+    if request.connection_id and current_directory is None:
         try:
-            # Use agent_tools.call_ash_ipc to execute pwd command
-            from agent_tools import call_ash_ipc
-            
+            # Use agent_tools.call_ash_ipc_async to execute pwd command
+            # (async so the event loop is not blocked while the bridge responds)
             # First, determine connection type to route to correct channel
-            list_result = call_ash_ipc('ssh-list-connections')
-            connections = list_result.get('connections', [])
-            target = next((c for c in connections if c.get('connectionId') == request.connection_id), None)
+            # (from the shared connection cache when it is fresh)
+            conn_type = await agent_tools._resolve_conn_type_async(request.connection_id)
             
-            if target:
-                conn_type = target.get('type', 'ssh')
-                channel_map = {
-                    'ssh': 'ssh-exec-command',
-                    'telnet': 'telnet-exec-command',
-                    'serial': 'serial-exec-command'
-                }
-                ipc_channel = channel_map.get(conn_type, 'ssh-exec-command')
+            if conn_type:
+                ipc_channel = agent_tools._CHANNEL_MAP.get(conn_type, 'ssh-exec-command')
                 
                 # Execute pwd command
-                pwd_result = call_ash_ipc(ipc_channel, request.connection_id, 'pwd')
+                pwd_result = await agent_tools.call_ash_ipc_async(ipc_channel, request.connection_id, 'pwd')
                 if pwd_result.get('success') and pwd_result.get('output'):
                     current_directory = pwd_result.get('output', '').strip()
-                    logger.info(f"Current directory for {request.connection_id}: {current_directory}")
+                    agent_tools._cache_cwd(request.connection_id, current_directory)
+                    logger.info("Current directory for %s: %s", request.connection_id, current_directory)
         except Exception as e:
             # If pwd fails, continue without current directory info
-            logger.warning(f"Failed to get current directory: {str(e)}")
+            logger.warning("Failed to get current directory: %s", e)
             current_directory = None
     
     # Create new assistant for each request to ensure statelessness
     # (Qwen-Agent Assistant might maintain internal state/history if reused)
-    logger.info(f"Creating new assistant for task")
-    system_prompt = build_system_prompt(request.connection_id, current_directory)
+    logger.info("Creating new assistant for task")
+    # The static instructions go to the Assistant (always first, byte-identical across
+    # requests, so the LLM server can reuse its prefix cache); the connection details
+    # go in a leading system message, which Qwen-Agent appends after them.
+    system_prompt = STATIC_SYSTEM_PROMPT
+    connection_prompt = build_connection_prompt(request.connection_id, current_directory)
     
     # If connection_id is provided, remove ash_list_connections from available tools
     # because the connection is already bound and listing is unnecessary
@@ -180,99 +855,72 @@ async def execute_task_stream(request: TaskRequest):
     if request.connection_id:
         if 'ash_list_connections' in available_tools:
             available_tools.remove('ash_list_connections')
-            logger.info(f"Removed ash_list_connections from available tools (connection_id provided: {request.connection_id})")
+            logger.info("Removed ash_list_connections from available tools (connection_id provided: %s)", request.connection_id)
     
     if request.llm_config:
-        # Build model config from request
-        llm_config_data = {
-            'model': request.llm_config.model or model_config['model'],
-            'model_server': request.llm_config.base_url or model_config['model_server'],
-            'api_key': request.llm_config.api_key or model_config['api_key'],
-            'generate_cfg': {
-                'temperature': request.llm_config.temperature if request.llm_config.temperature is not None else model_config['generate_cfg']['temperature'],
-                'max_tokens': request.llm_config.max_tokens if request.llm_config.max_tokens is not None else model_config['generate_cfg']['max_tokens'],
-                'top_p': model_config['generate_cfg']['top_p'],
-            }
-        }
-        
-        # Convert provider-specific URLs
-        if request.llm_config.provider == 'ollama':
-            base_url = request.llm_config.base_url or 'http://localhost:11434'
-            if not base_url.endswith('/v1'):
-                base_url = base_url.rstrip('/') + '/v1'
-            llm_config_data['model_server'] = base_url
-            llm_config_data['api_key'] = 'ollama'
-        elif request.llm_config.provider == 'ash':
-            # Ash backend proxies to Ollama, so use the same format
-            base_url = request.llm_config.base_url or 'https://ash.toktoktalk.com/v1'
-            if not base_url.endswith('/v1'):
-                base_url = base_url.rstrip('/') + '/v1'
-            llm_config_data['model_server'] = base_url
-            # Use the API key from request, or default to 'ollama' if not provided
-            api_key = request.llm_config.api_key or 'ollama'
-            llm_config_data['api_key'] = api_key
-            # Qwen-Agent may use api_key as Authorization header, but ash server needs X-API-Key
-            # Try to add custom headers if Qwen-Agent supports it
-            # Note: This depends on Qwen-Agent's implementation
-            if 'headers' not in llm_config_data:
-                llm_config_data['headers'] = {}
-            llm_config_data['headers']['X-API-Key'] = api_key
-        elif request.llm_config.provider == 'openai':
-            llm_config_data['model_server'] = request.llm_config.base_url or 'https://api.openai.com/v1'
-        elif request.llm_config.provider == 'anthropic':
-            base_url = request.llm_config.base_url or 'https://api.anthropic.com'
-            if not base_url.endswith('/v1'):
-                if '/v1' not in base_url:
-                    base_url = base_url.rstrip('/') + '/v1'
-            llm_config_data['model_server'] = base_url
-
-        logger.info(f"Using LLM config: provider={request.llm_config.provider}, model={llm_config_data['model']}, server={llm_config_data['model_server']}")
+        # Build model config from request (cached: the frontend sends the same settings every time)
+        llm_config_data = dict(_compose_llm_config(
+            request.llm_config.provider,
+            request.llm_config.base_url,
+            request.llm_config.api_key,
+            request.llm_config.model,
+            request.llm_config.temperature,
+            request.llm_config.max_tokens,
+        ))
+
+        logger.info("Using LLM config: provider=%s, model=%s, server=%s", request.llm_config.provider, llm_config_data['model'], llm_config_data['model_server'])
         if request.llm_config.provider == 'ash':
-            logger.info(f"Ash API key: {api_key[:10]}... (truncated for security)")
-            logger.info(f"Ash LLM config keys: {list(llm_config_data.keys())}")
+            logger.info("Ash API key: %s... (truncated for security)", llm_config_data['api_key'][:10])
+            logger.info("Ash LLM config keys: %s", list(llm_config_data.keys()))
             if 'headers' in llm_config_data:
-                logger.info(f"Ash custom headers: {list(llm_config_data['headers'].keys())}")
-        
-        assistant = Assistant(
-            llm=llm_config_data,
-            system_message=system_prompt,
-            function_list=available_tools,
-        )
-    else:
-        # This branch is for the default assistant with a connection_id
-        assistant = Assistant(
-            llm=model_config,
-            system_message=system_prompt,
-            function_list=available_tools,
-        )
+                logger.info("Ash custom headers: %s", list(llm_config_data['headers'].keys()))
+
+    llm_cfg = llm_config_data if request.llm_config else model_config
 
-    messages = []
+    messages = [{"role": "system", "content": connection_prompt}]
     if request.conversation_history:
         # Convert 'tool' role to 'function' role for Qwen-Agent compatibility
         # Qwen-Agent's Pydantic model only accepts: user, assistant, system, function
         for msg in request.conversation_history:
             # Convert tool role to function role
             # (Frontend stores/compacts tool outputs; backend should not try to reinterpret custom fields.)
-            converted_msg = msg.copy()
-            if converted_msg.get('role') == 'tool':
-                converted_msg['role'] = 'function'
-            messages.append(converted_msg)
+            # Only tool messages are changed, so only those are copied
+            if msg.get('role') == 'tool':
+                msg = {**msg, 'role': 'function'}
+            messages.append(msg)
+        _stub_old_tool_results(messages)
     messages.append({"role": "user", "content": request.message})
     
-    def generate():
+    cache_key = None
+    if (_RESPONSE_CACHE_ENABLED and llm_cfg['generate_cfg']['temperature'] <= _RESPONSE_CACHE_MAX_TEMPERATURE
+            and not _has_tool_messages(messages)):
+        cache_key = _response_cache_key(llm_cfg, system_prompt, available_tools, messages)  # messages include connection_prompt
+        cached_frames = _response_cache_get(cache_key)
+        if cached_frames is not None:
+            logger.info("Replaying cached response (%d frames)", len(cached_frames))
+            # One body write; a sync iterator would cost a threadpool hop per frame
+            return Response(b"".join(cached_frames), media_type="text/event-stream", headers=_SSE_HEADERS)
+
+    # Building the Assistant sets up its LLM, tools and RAG memory; keep that off the event loop
+    assistant = await asyncio.to_thread(_build_assistant, llm_cfg, system_prompt, available_tools)
+
+    # Set by generate_sync(); decides whether the run may be cached
+    run_state = {'completed': False, 'used_tools': False}
+    
+    def generate_sync():
         # Maximum size per SSE message (to avoid "Payload Too Large" errors)
         # Use 32KB to be very safe (some servers/proxies have very strict limits)
         MAX_CHUNK_SIZE = 32 * 1024  # 32KB - very conservative, safe for all servers
-        logger.info(f"Starting SSE stream with MAX_CHUNK_SIZE={MAX_CHUNK_SIZE} bytes")
+        PREFIX_CHECK_INTERVAL = 64  # Full prefix comparison every N deltas of an assistant message
+        logger.info("Starting SSE stream with MAX_CHUNK_SIZE=%s bytes", MAX_CHUNK_SIZE)
         
         # Track the latest tool result of THIS run only.
         # This avoids mistakenly using old conversation history data when summarizing after an exception.
         last_tool_ctx = None  # {name, command, total_raw_size, stdout_head, stderr_head}
 
-        def _serialize_sse(obj: dict) -> tuple[str, int]:
-            serialized = json.dumps(obj, ensure_ascii=False)
-            sse_message = f"data: {serialized}\n\n"
-            return sse_message, len(sse_message.encode("utf-8"))
+        def _serialize_sse(obj: dict) -> tuple[bytes, int]:
+            sse_message = _sse_frame(obj)
+            return sse_message, len(sse_message)
 
         def _emit(obj: dict):
             """Emit a single SSE event if it fits MAX_CHUNK_SIZE.
@@ -300,7 +948,7 @@ async def execute_task_stream(request: TaskRequest):
                 if not sent:
                     chunk_size = int(chunk_size * 0.7)
                     if chunk_size < 5000:
-                        logger.error(f"Chunk size too small ({chunk_size} bytes), cannot send {base.get('type')}")
+                        logger.error("Chunk size too small (%s bytes), cannot send %s", chunk_size, base.get('type'))
                         # Last resort: send a small error and stop
                         yield from _emit({'type': 'error', 'content': 'Server response exceeded size limit. The command output was too large to process.'})
                         return False
@@ -320,7 +968,7 @@ async def execute_task_stream(request: TaskRequest):
             return (yield from _emit_text_chunks(base=base, text=text, text_key='chunk', index_key='index', initial_chunk_size=30 * 1024))
 
         def _generate_summary_text(command: str, stdout_head: str, stderr_head: str, total_size: int) -> str:
-            """Generate summary using LLM (functions disabled, streaming)."""
+            """Generate summary using LLM (functions disabled, non-streaming)."""
             summary_prompt = f"""Please provide a concise summary of the following command output.
 
 Command: {command or 'unknown'}
@@ -341,42 +989,51 @@ Summary:"""
 
             # IMPORTANT: Use raw LLM chat with functions disabled to avoid tool recursion
             summary_messages = [{"role": "user", "content": summary_prompt}]
-            summary_response = assistant.llm.chat(messages=summary_messages, functions=[], stream=True)
+            # Only the final text is used, so skip streaming (and re-scanning every partial response)
+            summary_response = assistant.llm.chat(messages=summary_messages, functions=[], stream=False)
 
             summary_text = ""
-            for chunk in summary_response:
-                if chunk and len(chunk) > 0:
-                    last_msg = chunk[-1]
-                    if last_msg.get('role') == 'assistant':
-                        summary_text = last_msg.get('content', '')
+            if summary_response:
+                last_msg = summary_response[-1]
+                if last_msg.get('role') == 'assistant':
+                    summary_text = last_msg.get('content', '')
             return summary_text or ""
         
         try:
-            logger.info(f"Running assistant with {len(messages)} messages.")
-            logger.info(f"LLM config: model={request.llm_config.model if request.llm_config else model_config['model']}, server={request.llm_config.base_url if request.llm_config else model_config['model_server']}")
+            logger.info("Running assistant with %s messages.", len(messages))
+            logger.info("LLM config: model=%s, server=%s", request.llm_config.model if request.llm_config else model_config['model'], request.llm_config.base_url if request.llm_config else model_config['model_server'])
             if request.conversation_history:
-                logger.info(f"Conversation history: {len(request.conversation_history)} previous messages")
+                logger.info("Conversation history: %s previous messages", len(request.conversation_history))
             else:
                 logger.warning("No conversation history provided - agent will start fresh")
             
             # 상태 추적: 이전 response를 추적하여 중복 방지
-            previous_response = []  # 이전 response_chunk 저장 (누적된 전체 응답)
+            previous_len = 0  # 이전 response_chunk 길이 (누적된 전체 응답의 메시지 수)
             # 각 assistant 메시지별로 content를 추적 (메시지별로 독립적으로 관리)
             assistant_content_map = {}  # {message_index: content} 형태로 각 assistant 메시지의 content 추적
+            # Deltas since the last full prefix check, per message (see PREFIX_CHECK_INTERVAL)
+            prefix_check_counts = {}
+            # UTF-8 size of each message's streamed content, kept as a running total
+            assistant_bytes = {}
             # Tool call에서 추출한 command를 큐에 저장 (실행 순서대로)
-            tool_command_queue = []  # FIFO 큐
+            tool_command_queue = deque()  # FIFO 큐
             
             # Qwen-Agent automatically includes tool results in the conversation
             # response_chunk는 누적된 전체 응답: [msg1, msg2, msg3, ...]
             for response_chunk in assistant.run(messages=messages):
                 # 이전 response와 비교해서 새로운 메시지만 추출
-                new_messages = response_chunk[len(previous_response):]
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Processing %s new messages (total: %s, previous: %s)", max(0, len(response_chunk) - previous_len), len(response_chunk), previous_len)
                 
-                logger.debug(f"Processing {len(new_messages)} new messages (total: {len(response_chunk)}, previous: {len(previous_response)})")
-                
-                # 핵심 수정: response_chunk 전체를 스캔해서 assistant 메시지의 content 업데이트를 확인
-                # (new_messages가 비어있어도, 기존 메시지의 content가 업데이트될 수 있음)
-                for idx, message in enumerate(response_chunk):
+                # Only the last previously seen message can still be growing (earlier ones
+                # are final), so scan from there instead of the whole accumulated response
+                # (새 메시지가 없어도, 마지막 메시지의 content가 업데이트될 수 있음)
+                # Tool results arrive complete, so a trailing function message is final too.
+                scan_start = min(previous_len, len(response_chunk))
+                if scan_start and response_chunk[scan_start - 1].get('role') == 'assistant':
+                    scan_start -= 1
+                for idx in range(scan_start, len(response_chunk)):
+                    message = response_chunk[idx]
                     event_type = message.get('role', 'unknown')
                     content = message.get('content', '')
                     
@@ -395,37 +1052,56 @@ Summary:"""
                             if not previous_content:
                                 # 첫 번째 content - 전체를 스트리밍
                                 content_to_send = content_str
-                            elif content_str != previous_content:
-                                # Content가 변경됨
-                                if content_str.startswith(previous_content):
-                                    # Content가 연장됨 - 새로운 부분만 스트리밍 (증분)
+                            elif len(content_str) > len(previous_content):
+                                # Content가 연장됨 - 새로운 부분만 스트리밍 (증분)
+                                # Qwen-Agent's content only grows, so slicing by length is enough;
+                                # comparing the whole prefix on every delta is O(n^2) per response.
+                                # Still verify it periodically in case the content was rewritten.
+                                checks = prefix_check_counts.get(idx, 0) + 1
+                                prefix_check_counts[idx] = checks
+                                if checks % PREFIX_CHECK_INTERVAL or content_str.startswith(previous_content):
                                     content_to_send = content_str[len(previous_content):]
                                 else:
-                                    # 완전히 다른 content (새로운 assistant 메시지이거나 내용이 완전히 바뀜)
+                                    # 완전히 다른 content (내용이 완전히 바뀜)
                                     content_to_send = content_str
+                            elif len(content_str) < len(previous_content):
+                                # 완전히 다른 content (새로운 assistant 메시지이거나 내용이 완전히 바뀜)
+                                content_to_send = content_str
                             
                             # Send content in chunks if too large
                             if content_to_send:
-                                content_size_bytes = len(content_to_send.encode('utf-8'))
-                                
                                 # Early check: if assistant content is getting extremely large, stop early
                                 # This prevents the response from growing unbounded
+                                # (only the delta is measured; a full resend restarts the count)
                                 MAX_ASSISTANT_CONTENT_SIZE = 5 * 1024 * 1024  # 5MB max assistant content
-                                if len(content_str.encode('utf-8')) > MAX_ASSISTANT_CONTENT_SIZE:
-                                    logger.warning(f"⚠️ Assistant content too large ({len(content_str.encode('utf-8'))} bytes), stopping to prevent response bloat")
+                                content_bytes = _utf8_len(content_to_send)
+                                if len(content_to_send) < len(content_str):
+                                    content_bytes += assistant_bytes.get(idx, 0)
+                                if content_bytes > MAX_ASSISTANT_CONTENT_SIZE:
+                                    logger.warning("⚠️ Assistant content too large (%s bytes), stopping to prevent response bloat", content_bytes)
                                     yield from _emit({'type': 'error', 'content': 'Assistant response too long. Please ask a more specific question.'})
                                     return
 
                                 # Try to emit as a single event; if too large, chunk it.
-                                sent = yield from _emit({'type': 'content_chunk', 'content': content_to_send})
+                                # Small deltas are passed as text so the stream can merge them.
+                                if len(content_to_send) <= _CONTENT_MERGE_MAX_CHARS:
+                                    yield _ContentDelta(content_to_send)
+                                    sent = True
+                                else:
+                                    frame = _content_chunk_frame(content_to_send)
+                                    sent = len(frame) < MAX_CHUNK_SIZE
+                                    if sent:
+                                        yield frame
                                 if sent:
+                                    # Per-delta logging: DEBUG only, it runs once per streamed token
                                     if not previous_content:
-                                        logger.info(f"✅ Streaming initial assistant content (idx={idx}): {len(content_to_send)} chars")
+                                        logger.debug("✅ Streaming initial assistant content (idx=%d): %d chars", idx, len(content_to_send))
                                     else:
-                                        logger.info(f"✅ Streaming content chunk (idx={idx}): +{len(content_to_send)} chars (total: {len(content_str)} chars)")
+                                        logger.debug("✅ Streaming content chunk (idx=%d): +%d chars (total: %d chars)", idx, len(content_to_send), len(content_str))
                                     assistant_content_map[idx] = content_str
+                                    assistant_bytes[idx] = content_bytes
                                 else:
-                                    logger.warning(f"⚠️ Assistant content too large (raw={content_size_bytes} bytes), chunking...")
+                                    logger.warning("⚠️ Assistant content too large (frame=%s bytes), chunking...", len(frame))
                                     ok = yield from _emit_text_chunks(
                                         base={'type': 'content_chunk'},
                                         text=content_to_send,
@@ -435,11 +1111,13 @@ Summary:"""
                                     )
                                     if ok:
                                         assistant_content_map[idx] = content_str
+                                        assistant_bytes[idx] = content_bytes
                         
                         # Tool call 실시간 스트리밍 (새로운 메시지에만)
-                        if idx >= len(previous_response):
+                        if idx >= previous_len:
                             function_call = message.get('function_call')
                             if function_call:
+                                run_state['used_tools'] = True
                                 tool_name = function_call.get('name', 'unknown_tool')
                                 tool_args = function_call.get('arguments', '{}')
                                 
@@ -449,67 +1127,68 @@ Summary:"""
                                     # tool_args가 빈 문자열이거나 None인 경우 처리
                                     if tool_args and tool_args.strip():
                                         try:
-                                            import json5
-                                            args = json5.loads(tool_args)
+                                            # Strict JSON first, json5 only for relaxed LLM output
+                                            args = agent_tools._parse_params(tool_args)
                                             command = args.get('command') or tool_args
                                         except Exception as e:
-                                            logger.warning(f"Failed to parse tool_args: {tool_args}, error: {e}")
+                                            logger.warning("Failed to parse tool_args: %s, error: %s", tool_args, e)
                                             command = tool_args if tool_args else None
                                     else:
-                                        logger.warning(f"tool_args is empty for {tool_name}: {repr(tool_args)}")
+                                        logger.warning("tool_args is empty for %s: %r", tool_name, tool_args)
                                         command = None
                                 
                                 # Command를 큐에 추가 (실행 순서대로)
                                 if command:
                                     tool_command_queue.append(command)
-                                    logger.info(f"✅ Saved command to queue: '{command}' (queue size: {len(tool_command_queue)})")
+                                    logger.info("✅ Saved command to queue: '%s' (queue size: %d)", command, len(tool_command_queue))
                                 else:
-                                    logger.warning(f"⚠️ No command extracted for {tool_name}, tool_args: {repr(tool_args)}")
+                                    logger.warning("⚠️ No command extracted for %s, tool_args: %r", tool_name, tool_args)
                                 
-                                logger.info(f"Tool call request: {tool_name} with args: {repr(tool_args[:200])}, command: {repr(command) if command else 'None'}")
+                                logger.info("Tool call request: %s with args: %r, command: %r", tool_name, tool_args[:200], command)
                                 
                                 # Tool call을 실시간으로 스트리밍 (사용자가 볼 수 있도록!)
-                                yield f"data: {json.dumps({
+                                yield _sse_frame({
                                     'type': 'tool_call',
                                     'name': tool_name,
                                     'args': tool_args,
                                     'command': command
-                                }, ensure_ascii=False)}\n\n"
+                                })
                     
                     # Check for tool results (Qwen-Agent uses both 'tool' and 'function' roles)
                     # 새로운 메시지만 처리 (중복 방지)
-                    elif event_type in ('tool', 'function') and idx >= len(previous_response):
+                    elif event_type in ('tool', 'function') and idx >= previous_len:
                         tool_name = message.get('name', 'unknown_tool')
-                        tool_content = str(content) if content else ''
-                        tool_content_size = len(tool_content.encode('utf-8')) if tool_content else 0
-                        logger.info(f"Tool {tool_name} result (role={event_type}): {tool_content[:100]}... (size: {tool_content_size} bytes)")
+                        tool_content = content if isinstance(content, str) else (str(content) if content else '')
+                        # Character count only: encoding the whole output just to log its byte size is wasted work
+                        logger.info("Tool %s result (role=%s): %s... (size: %d chars)", tool_name, event_type, tool_content[:100], len(tool_content))
                         
                         # 큐에서 command 가져오기 (실행 순서대로)
                         command = None
                         if tool_command_queue:
-                            command = tool_command_queue.pop(0)
-                            logger.info(f"✅ Retrieved command from queue: '{command}' (remaining: {len(tool_command_queue)})")
+                            command = tool_command_queue.popleft()
+                            logger.info("✅ Retrieved command from queue: '%s' (remaining: %d)", command, len(tool_command_queue))
                         
                         # Parse tool result JSON for structured display
                         try:
-                            parsed_result = json.loads(tool_content) if isinstance(tool_content, str) and tool_content.strip().startswith('{') else tool_content
+                            # (only the head is stripped: the output can be megabytes)
+                            parsed_result = agent_tools._json_loads(tool_content) if isinstance(tool_content, str) and tool_content[:64].lstrip().startswith('{') else tool_content
                             
-                            # Command 추출: tool_result에 포함된 command 우선 사용, 없으면 큐에서 가져오기
-                            result_command = None
-                            if isinstance(parsed_result, dict):
-                                result_command = parsed_result.get('command')
+                            # Non-dict results (plain text) carry none of the structured fields
+                            result_fields = parsed_result if isinstance(parsed_result, dict) else {}
                             
                             # Command 결정: tool_result의 command > 큐의 command
-                            final_command = result_command or command
+                            final_command = result_fields.get('command') or command
                             
                             # Structure the result for frontend rendering
-                            stdout = parsed_result.get('output', '') if isinstance(parsed_result, dict) else ''
-                            stderr = parsed_result.get('error', '') if isinstance(parsed_result, dict) else ''
+                            stdout = result_fields.get('output', '')
+                            stderr = result_fields.get('error', '')
+                            result_success = result_fields.get('success', True)
+                            result_exit_code = result_fields.get('exitCode', 0)
                             
                             # CRITICAL: Check raw size FIRST before any JSON serialization
                             # This prevents memory issues and allows early chunking decision
-                            stdout_size_bytes = len(stdout.encode('utf-8')) if stdout else 0
-                            stderr_size_bytes = len(stderr.encode('utf-8')) if stderr else 0
+                            stdout_size_bytes = _utf8_len(stdout) if stdout else 0
+                            stderr_size_bytes = _utf8_len(stderr) if stderr else 0
                             total_raw_size = stdout_size_bytes + stderr_size_bytes
                             
                             # Update latest tool context (for exception-time auto summary)
@@ -529,19 +1208,18 @@ Summary:"""
                             
                             # MAX_CHUNK_SIZE is defined at function level above
                             
-                            # Estimate JSON overhead (roughly 200 bytes for structure + 20% for encoding)
-                            estimated_json_overhead = 500 + int(total_raw_size * 0.2)
-                            estimated_total_size = total_raw_size + estimated_json_overhead
+                            # Serialized size: the structure plus the escaped strings
+                            estimated_total_size = _tool_result_size_bound(final_command, stdout, stdout_size_bytes, stderr, stderr_size_bytes, MAX_CHUNK_SIZE)
                             
-                            logger.info(f"Tool result raw size: stdout={stdout_size_bytes} bytes, stderr={stderr_size_bytes} bytes, total={total_raw_size} bytes")
-                            logger.info(f"Estimated serialized size: {estimated_total_size} bytes, max={MAX_CHUNK_SIZE} bytes")
+                            logger.debug("Tool result raw size: stdout=%d bytes, stderr=%d bytes, total=%d bytes", stdout_size_bytes, stderr_size_bytes, total_raw_size)
+                            logger.debug("Estimated serialized size: %d bytes, max=%d bytes", estimated_total_size, MAX_CHUNK_SIZE)
                             
                             # Auto-summarize extremely large outputs to prevent errors
                             if should_auto_summarize:
-                                logger.warning(f"⚠️ Tool result extremely large ({total_raw_size} bytes > {AUTO_SUMMARY_THRESHOLD} bytes), attempting auto-summarization...")
+                                logger.warning("⚠️ Tool result extremely large (%s bytes > %s bytes), attempting auto-summarization...", total_raw_size, AUTO_SUMMARY_THRESHOLD)
                                 try:
                                     # Send notification to frontend
-                                    yield f"data: {json.dumps({'type': 'message', 'content': f'Command output is very large ({total_raw_size // 1024 // 1024}MB). Generating summary...', 'role': 'system'}, ensure_ascii=False)}\n\n"
+                                    yield _sse_frame({'type': 'message', 'content': f'Command output is very large ({total_raw_size // 1024 // 1024}MB). Generating summary...', 'role': 'system'})
                                     
                                     summary_text = _generate_summary_text(
                                         final_command or 'unknown',
@@ -551,40 +1229,41 @@ Summary:"""
                                     )
                                     
                                     if summary_text:
-                                        logger.info(f"✅ Auto-generated summary: {len(summary_text)} chars")
+                                        logger.info("✅ Auto-generated summary: %s chars", len(summary_text))
+                                        # Reused if the run later fails with Payload Too Large
+                                        last_tool_ctx['summary'] = summary_text
                                         # Replace stdout with summary, keep stderr as-is (usually smaller)
                                         stdout = f"[Auto-summarized from {total_raw_size} bytes]\n\n{summary_text}\n\n[Original output was {total_raw_size} bytes. Use a more specific command to see full details.]"
-                                        stdout_size_bytes = len(stdout.encode('utf-8'))
+                                        stdout_size_bytes = _utf8_len(stdout)
                                         total_raw_size = stdout_size_bytes + stderr_size_bytes
-                                        logger.info(f"After summarization: total={total_raw_size} bytes")
+                                        logger.info("After summarization: total=%s bytes", total_raw_size)
                                         
                                         # Recalculate estimated size
-                                        estimated_json_overhead = 500 + int(total_raw_size * 0.2)
-                                        estimated_total_size = total_raw_size + estimated_json_overhead
+                                        estimated_total_size = _tool_result_size_bound(final_command, stdout, stdout_size_bytes, stderr, stderr_size_bytes, MAX_CHUNK_SIZE)
                                         
                                         # Send summary notification
-                                        yield f"data: {json.dumps({'type': 'message', 'content': 'Summary generated successfully.', 'role': 'system'}, ensure_ascii=False)}\n\n"
+                                        yield _sse_frame({'type': 'message', 'content': 'Summary generated successfully.', 'role': 'system'})
                                     else:
                                         logger.warning("⚠️ Failed to generate summary, proceeding with chunking")
                                         should_auto_summarize = False
                                 except Exception as summary_error:
-                                    logger.error(f"Failed to auto-summarize: {summary_error}", exc_info=True)
+                                    logger.error("Failed to auto-summarize: %s", summary_error, exc_info=True)
                                     logger.warning("⚠️ Proceeding with chunking instead of summary")
                                     should_auto_summarize = False
                             
-                            # If estimated size exceeds limit, ALWAYS chunk (don't even try to serialize)
-                            if estimated_total_size >= MAX_CHUNK_SIZE or total_raw_size >= (MAX_CHUNK_SIZE - 1000):
-                                logger.warning(f"⚠️ Tool result too large (raw={total_raw_size} bytes, estimated={estimated_total_size} bytes > {MAX_CHUNK_SIZE} bytes), FORCING chunking without serialization")
+                            # If the frame could exceed the limit, ALWAYS chunk (don't even try to serialize)
+                            if estimated_total_size >= MAX_CHUNK_SIZE:
+                                logger.warning("⚠️ Tool result too large (raw=%s bytes, estimated=%s bytes > %s bytes), FORCING chunking without serialization", total_raw_size, estimated_total_size, MAX_CHUNK_SIZE)
                                 # Skip serialization check, go straight to chunking
                                 force_chunk = True
                             else:
-                                # Build the full result to check actual serialized size
+                                # Fits by the bound above; _emit still checks the actual size
                                 structured_result = {
                                     'type': 'tool_result',
                                     'name': tool_name,
                                     'command': final_command,
-                                    'success': parsed_result.get('success', True) if isinstance(parsed_result, dict) else True,
-                                    'exitCode': parsed_result.get('exitCode', 0) if isinstance(parsed_result, dict) else 0,
+                                    'success': result_success,
+                                    'exitCode': result_exit_code,
                                     'stdout': stdout,
                                     'stderr': stderr,
                                 }
@@ -603,8 +1282,8 @@ Summary:"""
                                     'type': 'tool_result',
                                     'name': tool_name,
                                     'command': final_command,
-                                    'success': parsed_result.get('success', True) if isinstance(parsed_result, dict) else True,
-                                    'exitCode': parsed_result.get('exitCode', 0) if isinstance(parsed_result, dict) else 0,
+                                    'success': result_success,
+                                    'exitCode': result_exit_code,
                                     'stdout': '',  # Will be sent in chunks
                                     'stderr': '',  # Will be sent in chunks
                                     'chunked': True,
@@ -620,42 +1299,42 @@ Summary:"""
                         except (json.JSONDecodeError, AttributeError) as e:
                             # Fallback: if parsing fails, send as raw content
                             # But still check size and chunk if needed
-                            logger.warning(f"Could not parse tool result as JSON: {e}, sending as raw content")
+                            logger.warning("Could not parse tool result as JSON: %s, sending as raw content", e)
                             
                             sent = yield from _emit({'type': 'tool_result', 'name': tool_name, 'command': command, 'content': tool_content})
                             if not sent:
                                 # Truncate content to fit
                                 max_content_size = MAX_CHUNK_SIZE - 500  # Reserve space for JSON
-                                truncated_content = tool_content[:max_content_size] if len(tool_content) > max_content_size else tool_content
+                                truncated_content = _truncate_utf8(tool_content, max_content_size)
                                 yield from _emit({'type': 'tool_result', 'name': tool_name, 'command': command, 'content': truncated_content, 'truncated': True})
                         except Exception as e:
                             # Catch any other errors in tool result processing
-                            logger.error(f"Error processing tool result: {e}", exc_info=True)
+                            logger.error("Error processing tool result: %s", e, exc_info=True)
                             # Ensure error message fits in MAX_CHUNK_SIZE
                             error_content = f'Error processing tool result: {str(e)}'
                             max_error_content = MAX_CHUNK_SIZE - 200  # Reserve space for JSON structure
-                            if len(error_content.encode('utf-8')) > max_error_content:
-                                error_content = error_content[:max_error_content]
+                            error_content = _truncate_utf8(error_content, max_error_content)
                             sent = yield from _emit({'type': 'error', 'content': error_content})
                             if not sent:
                                 yield from _emit({'type': 'error', 'content': 'Error processing tool result'})
                 
                 # 이전 response 업데이트 (중복 방지)
-                previous_response = response_chunk.copy()
+                previous_len = len(response_chunk)
             
             logger.info("Assistant run completed.")
+            run_state['completed'] = True
             yield from _emit({'type': 'done', 'timestamp': datetime.now().isoformat()})
             
         except Exception as e:
             error_msg = str(e)
-            logger.error(f"Streaming task error: {error_msg}", exc_info=True)
+            logger.error("Streaming task error: %s", error_msg, exc_info=True)
             
             # Check if error is related to payload size
             if 'Payload Too Large' in error_msg or '413' in error_msg or 'too large' in error_msg.lower():
                 logger.error("⚠️ PAYLOAD TOO LARGE ERROR DETECTED - This indicates the response exceeded server limits")
-                logger.error(f"Error details: {error_msg}")
-                logger.error(f"⚠️ This error occurred AFTER tool_result was sent. Likely caused by assistant content_chunk being too large.")
-                logger.error(f"⚠️ Check logs above for 'Assistant content too large' or 'Content chunk too large' messages.")
+                logger.error("Error details: %s", error_msg)
+                logger.error("⚠️ This error occurred AFTER tool_result was sent. Likely caused by assistant content_chunk being too large.")
+                logger.error("⚠️ Check logs above for 'Assistant content too large' or 'Content chunk too large' messages.")
                 
                 # Try to automatically summarize the last tool output of THIS run, then send it
                 try:
@@ -664,10 +1343,11 @@ Summary:"""
                         cmd_for_summary = last_tool_ctx.get('command') or 'unknown'
                         original_size = int(last_tool_ctx.get('total_raw_size') or 0)
 
-                        logger.info(f"🔄 Attempting to summarize last tool output (this run): {tool_name_for_summary} ({original_size} bytes)")
+                        logger.info("🔄 Attempting to summarize last tool output (this run): %s (%s bytes)", tool_name_for_summary, original_size)
                         yield from _emit({'type': 'message', 'content': 'Large command output detected. Generating summary and retrying...', 'role': 'system'})
 
-                        summary_text = _generate_summary_text(
+                        # Already summarized before it was sent? Then skip a second LLM call
+                        summary_text = last_tool_ctx.get('summary') or _generate_summary_text(
                             cmd_for_summary,
                             last_tool_ctx.get('stdout_head', ''),
                             last_tool_ctx.get('stderr_head', ''),
@@ -693,9 +1373,8 @@ Summary:"""
                                 'originalSize': original_size,
                             }
 
-                            summarized_json = json.dumps(summarized_result, ensure_ascii=False)
-                            summarized_sse = f"data: {summarized_json}\n\n"
-                            if len(summarized_sse.encode('utf-8')) < MAX_CHUNK_SIZE:
+                            summarized_sse = _sse_frame(summarized_result)
+                            if len(summarized_sse) < MAX_CHUNK_SIZE:
                                 yield summarized_sse
                                 yield from _emit({'type': 'tool_result_complete', 'name': tool_name_for_summary})
                                 yield from _emit({'type': 'message', 'content': 'Summary generated and stored. You can continue with your next command.', 'role': 'system'})
@@ -704,11 +1383,11 @@ Summary:"""
                     # Fallback: simple error if we couldn't summarize
                     yield from _emit({'type': 'error', 'content': 'Server response exceeded size limit. The command output was too large to process.'})
                 except Exception as auto_summary_error:
-                    logger.error(f"Failed to auto-summarize: {auto_summary_error}", exc_info=True)
+                    logger.error("Failed to auto-summarize: %s", auto_summary_error, exc_info=True)
                     try:
                         yield from _emit({'type': 'error', 'content': 'Server response exceeded size limit. The command output was too large to process.'})
                     except Exception as send_error:
-                        logger.error(f"Failed to send error message: {send_error}")
+                        logger.error("Failed to send error message: %s", send_error)
             else:
                 # Regular error
                 try:
@@ -719,29 +1398,63 @@ Summary:"""
                     if not sent:
                         yield from _emit({'type': 'error', 'content': 'An error occurred'})
                 except Exception as send_error:
-                    logger.error(f"Failed to send error message: {send_error}")
+                    logger.error("Failed to send error message: %s", send_error)
         finally:
-            yield "data: [DONE]\n\n"
+            yield _SSE_DONE
             logger.info("Sent final DONE signal")
     
+    frames = generate_sync()
+    if cache_key:
+        frames = _record_frames(frames, cache_key, run_state)
+    
     return StreamingResponse(
-        generate(),
+        _iterate_in_thread(frames),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Access-Control-Allow-Origin": "*",
-            # Disable any potential response size limits at HTTP level
-            "X-Accel-Buffering": "no",  # Disable nginx buffering if present
-        }
+        headers=_SSE_HEADERS
     )
 
+def _uvicorn_loop_and_http() -> Tuple[str, str]:
+    """Pick uvloop/httptools when importable, else uvicorn's pure-Python fallbacks.
+
+    Importing them here (rather than relying on uvicorn's "auto") also lets
+    PyInstaller see them, so the bundled backend gets the C implementations too.
+    """
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"  # uvloop is not available on Windows
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        http = "h11"
+    return loop, http
+
+
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # Needed for workers > 1 in the PyInstaller build
+
+    loop_impl, http_impl = _uvicorn_loop_and_http()
+    try:
+        workers = max(1, int(os.getenv("ASH_WORKERS", "1")))
+    except ValueError:
+        logger.error("Invalid ASH_WORKERS value %r, using 1", os.getenv("ASH_WORKERS"))
+        workers = 1
+    if workers > 1:
+        # Caches (responses, connection types, prompts) are per process
+        logger.warning("Running %d workers; in-process caches are not shared", workers)
+
     # Configure uvicorn with increased limits for large SSE responses
     uvicorn.run(
-        app, 
+        # uvicorn needs an import string to spawn multiple workers
+        "app:app" if workers > 1 else app,
         host="127.0.0.1", 
         port=54111,
+        loop=loop_impl,
+        http=http_impl,
+        workers=workers,
         limit_max_requests=10000,  # Increase max concurrent requests
         timeout_keep_alive=300,    # 5 minutes keep-alive for long SSE streams
     )
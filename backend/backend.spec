@@ -54,6 +54,10 @@ a = Analysis(
         'appdirs',
         'fastapi',
         'uvicorn',
+        'uvicorn.loops.uvloop',
+        'uvicorn.protocols.http.httptools_impl',
+        'uvloop',
+        'httptools',
         'pydantic',
         'json5',
         'agent_tools',
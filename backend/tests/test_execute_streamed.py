@@ -0,0 +1,30 @@
+"""_execute_streamed must return what the exec channels return, within their output cap."""
+import agent_tools
+
+
+def _stream(monkeypatch, frames):
+    monkeypatch.setattr(agent_tools, 'call_ash_ipc_stream', lambda channel, *args: iter(frames))
+    return agent_tools._execute_streamed('ssh-1', 'cmd')
+
+
+def test_output_is_trimmed_like_the_exec_channels(monkeypatch):
+    result = _stream(monkeypatch, [
+        {'stream': 'stdout', 'chunk': '  hello\n'},
+        {'stream': 'stderr', 'chunk': 'warn\n'},
+        {'done': True, 'success': True, 'exitCode': 0, 'type': 'ssh'},
+    ])
+
+    assert result['output'] == 'hello'
+    assert result['error'] == 'warn'
+
+
+def test_output_is_capped_while_streaming(monkeypatch):
+    monkeypatch.setattr(agent_tools, '_EXEC_OUTPUT_MAX', 10)
+    result = _stream(monkeypatch, [
+        {'stream': 'stdout', 'chunk': '12345678'},
+        {'stream': 'stdout', 'chunk': 'abcdef'},
+        {'stream': 'stdout', 'chunk': 'dropped'},
+        {'done': True, 'success': True, 'exitCode': 0, 'type': 'ssh'},
+    ])
+
+    assert result['output'] == '12345678ab' + agent_tools._OUTPUT_TRUNCATED
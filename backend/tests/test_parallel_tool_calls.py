@@ -0,0 +1,76 @@
+"""ParallelToolAssistant must not overlap calls that share a connection or prompt the user."""
+import threading
+import time
+
+from qwen_agent.llm.schema import ASSISTANT, FunctionCall, Message
+
+import app
+
+
+class _RecordingAssistant(app.ParallelToolAssistant):
+    """Emits one turn with the given tool calls, then records how the calls overlap."""
+
+    def __init__(self, calls):
+        self.mem = None  # No LLM here, so skip Qwen-Agent's default RAG memory
+        super().__init__(llm=None, function_list=['ash_execute_command', 'ash_ask_user'])
+        self._turns = [[
+            Message(role=ASSISTANT, content='', function_call=FunctionCall(name=name, arguments=args),
+                    extra={'function_id': str(i)})
+            for i, (name, args) in enumerate(calls)
+        ], [Message(role=ASSISTANT, content='done')]]
+        self._lock = threading.Lock()
+        self._active = {}
+        self.max_active = {}
+        self.total_max_active = 0
+
+    def _prepend_knowledge_prompt(self, messages, **kwargs):
+        return messages
+
+    def _call_llm(self, messages, functions=None, stream=True, extra_generate_cfg=None):
+        yield self._turns.pop(0)
+
+    def _call_tool(self, tool_name, tool_args='{}', **kwargs):
+        lane = app._tool_lane(tool_name, tool_args)
+        with self._lock:
+            self._active[lane] = self._active.get(lane, 0) + 1
+            self.max_active[lane] = max(self.max_active.get(lane, 0), self._active[lane])
+            self.total_max_active = max(self.total_max_active, sum(self._active.values()))
+        time.sleep(0.05)
+        with self._lock:
+            self._active[lane] -= 1
+        return f'{tool_name} {tool_args}'
+
+
+def _exec(connection_id, command):
+    return ('ash_execute_command', f'{{"connection_id": "{connection_id}", "command": "{command}"}}')
+
+
+def _run(calls):
+    assistant = _RecordingAssistant(calls)
+    *_, response = assistant.run(messages=[{'role': 'user', 'content': 'go'}])
+    results = [m['content'] for m in response if m['role'] == 'function']
+    return assistant, results
+
+
+def test_calls_on_one_serial_connection_run_one_at_a_time():
+    calls = [_exec('serial-1', 'show version'), _exec('serial-1', 'show interfaces')]
+    assistant, results = _run(calls)
+
+    assert assistant.max_active[('connection', 'serial-1')] == 1
+    assert results == [f'{name} {args}' for name, args in calls]
+
+
+def test_calls_on_one_telnet_connection_run_one_at_a_time_beside_other_connections():
+    calls = [_exec('telnet-1', 'uptime'), _exec('ssh-1', 'uptime'), _exec('telnet-1', 'date')]
+    assistant, results = _run(calls)
+
+    assert assistant.max_active[('connection', 'telnet-1')] == 1
+    assert assistant.total_max_active == 2  # telnet-1 and ssh-1 still overlap
+    assert results == [f'{name} {args}' for name, args in calls]
+
+
+def test_ask_user_calls_run_one_at_a_time():
+    calls = [('ash_ask_user', '{"question": "Password?"}'), ('ash_ask_user', '{"question": "Port?"}')]
+    assistant, _ = _run(calls)
+
+    assert assistant.max_active[('tool', 'ash_ask_user')] == 1
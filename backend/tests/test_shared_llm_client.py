@@ -0,0 +1,30 @@
+"""_use_shared_llm_client must only swap the client Qwen-Agent's OpenAI model calls through."""
+from qwen_agent.llm.oai import TextChatAtOAI
+
+import app
+
+_CFG = {'model': 'm', 'model_server': 'http://llm.test/v1', 'api_key': 'k', 'headers': {'X-API-Key': 'k'}}
+
+
+def test_llm_calls_go_through_the_shared_client_unchanged(monkeypatch):
+    llm = TextChatAtOAI(_CFG)
+    app._use_shared_llm_client(llm, _CFG)
+    client = app._get_llm_client('http://llm.test/v1', 'k')
+    sent = {}
+    monkeypatch.setattr(client.chat.completions, 'create', lambda *args, **kwargs: sent.update(kwargs))
+
+    llm._chat_complete_create(model='m', messages=[], top_k=3, request_timeout=5)
+
+    assert sent == {'model': 'm', 'messages': [], 'extra_body': {'top_k': 3}, 'timeout': 5}
+    assert 'X-API-Key' not in client.default_headers  # Qwen-Agent never sends cfg headers either
+
+
+def test_qwen_agent_without_create_hooks_is_left_alone():
+    llm = TextChatAtOAI(_CFG)
+    del llm._chat_complete_create
+    del llm._complete_create
+
+    app._use_shared_llm_client(llm, _CFG)
+
+    assert not hasattr(llm, '_chat_complete_create')
+    assert not hasattr(llm, '_complete_create')
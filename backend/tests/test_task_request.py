@@ -0,0 +1,22 @@
+"""TaskRequest must reject oversized conversation histories before any work is done."""
+from fastapi.testclient import TestClient
+
+import app
+
+client = TestClient(app.app)
+
+
+def test_oversized_history_is_rejected():
+    history = [{'role': 'user', 'content': 'hi'}] * (app._MAX_HISTORY_MESSAGES + 1)
+
+    response = client.post('/agent/execute/stream', json={'message': 'go', 'conversation_history': history})
+
+    assert response.status_code == 422
+
+
+def test_history_at_the_limit_is_accepted():
+    history = [{'role': 'user', 'content': 'hi'}] * app._MAX_HISTORY_MESSAGES
+
+    request = app.TaskRequest(message='go', conversation_history=history)
+
+    assert len(request.conversation_history) == app._MAX_HISTORY_MESSAGES
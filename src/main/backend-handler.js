@@ -3,6 +3,7 @@ import path from 'node:path';
 import fs from 'node:fs';
 import http from 'node:http';
 import { app, ipcMain } from 'electron';
+import { getIPCBridgeSocketPath } from './ipc-bridge-handler.js';
 
 // Backend process management
 let pyProc = null;
@@ -100,6 +101,14 @@ async function waitForHealth(url, timeoutMs = 30000) {
   });
 }
 
+/**
+ * Env vars pointing the backend at the IPC bridge Unix socket (if available)
+ */
+function ipcSocketEnv() {
+  const socketPath = getIPCBridgeSocketPath();
+  return socketPath ? { ASH_IPC_SOCKET: socketPath } : {};
+}
+
 /**
  * Start Python backend
  */
@@ -165,7 +174,8 @@ export async function startBackend() {
         env: { 
           ...process.env, 
           PYTHONUNBUFFERED: '1',
-          ASH_DATA_DIR: userDataPath
+          ASH_DATA_DIR: userDataPath,
+          ...ipcSocketEnv()
         },
         stdio: ['pipe', 'pipe', 'pipe'],
         shell: process.platform === 'win32'
@@ -361,7 +371,8 @@ export async function startBackend() {
         env: { 
           ...process.env, 
           PYTHONUNBUFFERED: '1',
-          ASH_DATA_DIR: userDataPath
+          ASH_DATA_DIR: userDataPath,
+          ...ipcSocketEnv()
         },
         stdio: ['pipe', 'pipe', 'pipe']
       });
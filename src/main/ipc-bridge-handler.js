@@ -1,5 +1,8 @@
 import { ipcMain } from 'electron';
 import http from 'node:http';
+import fs from 'node:fs';
+import os from 'node:os';
+import path from 'node:path';
 import { URL } from 'node:url';
 import { getSSHConnections, executeSSHCommand } from './ssh-handler.js';
 import { getTelnetConnections, executeTelnetCommand } from './telnet-handler.js';
@@ -14,7 +17,13 @@ import { getLocalSessions, executeLocalCommand } from './local-pty-handler.js';
  */
 
 const IPC_BRIDGE_PORT = 54112;
+// Unix domain socket the bridge also listens on (not used on Windows).
+// The Python backend prefers it over TCP when ASH_IPC_SOCKET points to it.
+const IPC_BRIDGE_SOCKET = process.platform === 'win32'
+  ? null
+  : (process.env.ASH_IPC_SOCKET || path.join(os.tmpdir(), `ash-ipc-${process.getuid()}.sock`));
 let ipcBridgeServer = null;
+let ipcBridgeSocketServer = null;
 let mainWindow = null;
 
 export function setMainWindow(window) {
@@ -58,205 +67,445 @@ const requestUserApproval = async (question, isPassword = false) => {
 };
 
 /**
- * Start IPC bridge HTTP server
+ * Helper: Find which kind of connection an ID belongs to ('ssh', 'telnet', 'serial', 'local')
  */
-export function startIPCBridge() {
-  if (ipcBridgeServer) {
-    console.log('IPC bridge server already running');
-    return;
+const resolveConnectionType = (connectionId) => {
+  if (getSSHConnections().has(connectionId)) return 'ssh';
+  if (getTelnetConnections().has(connectionId)) return 'telnet';
+  if (getSerialConnections().has(connectionId)) return 'serial';
+  if (getLocalSessions().has(connectionId)) return 'local';
+  return null;
+};
+
+// Reported with not_found so the agent can tell a wrong ID from having no connections
+const countActiveConnections = () =>
+  getSSHConnections().size + getTelnetConnections().size + getSerialConnections().size + getLocalSessions().size;
+
+const commandExecutors = {
+  ssh: executeSSHCommand,
+  telnet: executeTelnetCommand,
+  serial: executeSerialCommand,
+  local: executeLocalCommand,
+};
+
+/**
+ * In-flight requests that the backend may cancel via POST /ipc-cancel ({ "request_id": "..." })
+ */
+const cancellableRequests = new Map(); // request_id -> AbortController
+
+const registerCancellable = (requestId) => {
+  const controller = new AbortController();
+  if (requestId) {
+    cancellableRequests.set(requestId, controller);
+  }
+  return controller;
+};
+
+const unregisterCancellable = (requestId) => {
+  if (requestId) {
+    cancellableRequests.delete(requestId);
+  }
+};
+
+/**
+ * Run a command on any connection type. Only SSH commands can be cancelled.
+ */
+const executeOnConnection = (connectionType, connectionId, command, onData, signal) => {
+  if (connectionType === 'ssh') {
+    return executeSSHCommand(connectionId, command, onData, signal);
   }
+  return commandExecutors[connectionType](connectionId, command);
+};
+
+/**
+ * Stream command output as newline-delimited JSON instead of one buffered response.
+ *
+ * Request body: { "args": [connectionId, command] }
+ * Response lines:
+ *   { "stream": "stdout" | "stderr", "chunk": "..." }   (zero or more)
+ *   { "done": true, "success": ..., "exitCode": ..., "type": ... }
+ *   { "done": true, "success": false, "error": "not_found", "activeConnections": N }
+ *   { "error": "..." }                                  (on failure, instead of "done")
+ */
+function handleExecStreamRequest(req, res) {
+  let body = '';
+  req.on('data', chunk => {
+    body += chunk.toString();
+  });
+
+  req.on('end', async () => {
+    res.writeHead(200, { 'Content-Type': 'application/x-ndjson' }); // chunked transfer encoding
+    const writeLine = (obj) => res.write(JSON.stringify(obj) + '\n');
+    let requestId = null;
+
+    try {
+      const data = JSON.parse(body);
+      requestId = data.request_id;
+      const controller = registerCancellable(requestId);
+      const [connectionId, command] = data.args || [];
+      const connectionType = resolveConnectionType(connectionId);
+      if (!connectionType) {
+        writeLine({ done: true, success: false, error: 'not_found', activeConnections: countActiveConnections() });
+        return;
+      }
 
-  ipcBridgeServer = http.createServer(async (req, res) => {
-    // CORS headers
-    res.setHeader('Access-Control-Allow-Origin', '*');
-    res.setHeader('Access-Control-Allow-Methods', 'GET, POST, OPTIONS');
-    res.setHeader('Access-Control-Allow-Headers', 'Content-Type');
+      console.log(`[IPC Bridge] Streaming ${connectionType} command on connection ${connectionId}: ${command}`);
+      // SSH output is forwarded as it arrives; other types are written once complete
+      const execResult = await executeOnConnection(
+        connectionType, connectionId, command, (stream, chunk) => writeLine({ stream, chunk }), controller.signal
+      );
+      if (connectionType !== 'ssh') {
+        if (execResult.output) writeLine({ stream: 'stdout', chunk: execResult.output });
+        if (execResult.error) writeLine({ stream: 'stderr', chunk: execResult.error });
+      }
 
-    if (req.method === 'OPTIONS') {
-      res.writeHead(200);
+      writeLine({ done: true, success: execResult.success, exitCode: execResult.exitCode, type: connectionType });
+      console.log(`[IPC Bridge] Streamed ${connectionType} command completed`);
+    } catch (error) {
+      console.error(`[IPC Bridge] Streamed command execution failed:`, error);
+      writeLine({ error: error.message });
+    } finally {
+      unregisterCancellable(requestId);
       res.end();
-      return;
     }
+  });
+}
 
-    try {
-      const url = new URL(req.url, `http://${req.headers.host}`);
-      const path = url.pathname;
-
-      if (req.method === 'POST' && path === '/ipc-invoke') {
-        let body = '';
-        req.on('data', chunk => {
-          body += chunk.toString();
-        });
-
-        req.on('end', async () => {
-          let handler = 'unknown'; // Define here to be accessible in catch block
-          try {
-            const data = JSON.parse(body);
-            handler = data.channel || data.handler;
-            const args = data.args || [];
-
-            console.log(`[IPC Bridge] Received request: handler=${handler}, args count=${args.length}`);
-
-            // Set a longer timeout for the request (5 minutes for long-running commands)
-            req.setTimeout(300000); // 5 minutes
-
-            let result;
-
-            switch (handler) {
-              case 'ssh-exec-command':
-              case 'ssh-execute': {
-                console.log(`[IPC Bridge] Executing SSH command on connection ${args[0]}: ${args[1]}`);
-                try {
-                  result = await executeSSHCommand(args[0], args[1]);
-                  console.log(`[IPC Bridge] SSH command completed successfully`);
-                } catch (error) {
-                  console.error(`[IPC Bridge] SSH command execution failed:`, error);
-                  throw error;
-                }
-                break;
-              }
+/**
+ * Connection change notifications (GET /ipc-events, Server-Sent Events)
+ *
+ * While at least one client is subscribed, the connection registries are
+ * checked periodically and subscribers are told when they change, so the
+ * Python backend can keep its connection cache until it is actually stale.
+ */
+const EVENTS_CHECK_INTERVAL_MS = 1000;
+const EVENTS_HEARTBEAT_MS = 15000;
+const eventSubscribers = new Set();
+let eventsCheckTimer = null;
+let eventsHeartbeatTimer = null;
+let knownConnectionIds = new Set();
+
+const getAllConnectionIds = () => new Set([
+  ...getSSHConnections().keys(),
+  ...getTelnetConnections().keys(),
+  ...getSerialConnections().keys(),
+  ...getLocalSessions().keys(),
+]);
+
+const broadcastEvent = (event, data) => {
+  const message = `event: ${event}\ndata: ${JSON.stringify(data)}\n\n`;
+  for (const res of eventSubscribers) {
+    res.write(message);
+  }
+};
 
-              case 'telnet-exec-command':
-              case 'telnet-execute': {
-                console.log(`[IPC Bridge] Executing Telnet command on connection ${args[0]}: ${args[1]}`);
-                try {
-                  result = await executeTelnetCommand(args[0], args[1]);
-                  console.log(`[IPC Bridge] Telnet command completed successfully`);
-                } catch (error) {
-                  console.error(`[IPC Bridge] Telnet command execution failed:`, error);
-                  throw error;
-                }
-                break;
+const checkConnectionChanges = () => {
+  const currentIds = getAllConnectionIds();
+  const added = [...currentIds].filter(id => !knownConnectionIds.has(id));
+  const removed = [...knownConnectionIds].filter(id => !currentIds.has(id));
+  knownConnectionIds = currentIds;
+
+  for (const connectionId of removed) {
+    broadcastEvent('connection-closed', { connectionId });
+  }
+  if (added.length > 0 || removed.length > 0) {
+    broadcastEvent('connections-changed', { added, removed });
+  }
+};
+
+function handleEventsRequest(req, res) {
+  res.writeHead(200, {
+    'Content-Type': 'text/event-stream',
+    'Cache-Control': 'no-cache',
+    'Connection': 'keep-alive',
+  });
+  res.write(': connected\n\n');
+
+  if (eventSubscribers.size === 0) {
+    knownConnectionIds = getAllConnectionIds();
+    eventsCheckTimer = setInterval(checkConnectionChanges, EVENTS_CHECK_INTERVAL_MS);
+    // Comment lines keep idle sockets from hitting the server timeout
+    eventsHeartbeatTimer = setInterval(() => {
+      for (const subscriber of eventSubscribers) {
+        subscriber.write(': ping\n\n');
+      }
+    }, EVENTS_HEARTBEAT_MS);
+  }
+  eventSubscribers.add(res);
+  console.log(`[IPC Bridge] Event subscriber connected (${eventSubscribers.size} total)`);
+
+  req.on('close', () => {
+    eventSubscribers.delete(res);
+    if (eventSubscribers.size === 0) {
+      clearInterval(eventsCheckTimer);
+      clearInterval(eventsHeartbeatTimer);
+      eventsCheckTimer = null;
+      eventsHeartbeatTimer = null;
+    }
+    console.log(`[IPC Bridge] Event subscriber disconnected (${eventSubscribers.size} remaining)`);
+  });
+}
+
+/**
+ * Handle a single IPC bridge HTTP request (shared by the TCP and socket listeners)
+ */
+async function handleBridgeRequest(req, res) {
+  // CORS headers
+  res.setHeader('Access-Control-Allow-Origin', '*');
+  res.setHeader('Access-Control-Allow-Methods', 'GET, POST, OPTIONS');
+  res.setHeader('Access-Control-Allow-Headers', 'Content-Type');
+
+  if (req.method === 'OPTIONS') {
+    res.writeHead(200);
+    res.end();
+    return;
+  }
+
+  try {
+    // Host is irrelevant here (and is not a valid hostname for socket requests)
+    const url = new URL(req.url, 'http://localhost');
+    const pathname = url.pathname;
+
+    if (req.method === 'POST' && pathname === '/ipc-invoke') {
+      let body = '';
+      req.on('data', chunk => {
+        body += chunk.toString();
+      });
+
+      req.on('end', async () => {
+        let handler = 'unknown'; // Define here to be accessible in catch block
+        let requestId = null;
+        try {
+          const data = JSON.parse(body);
+          handler = data.channel || data.handler;
+          const args = data.args || [];
+          requestId = data.request_id;
+          const controller = registerCancellable(requestId);
+
+          console.log(`[IPC Bridge] Received request: handler=${handler}, args count=${args.length}`);
+
+          // Set a longer timeout for the request (5 minutes for long-running commands)
+          req.setTimeout(300000); // 5 minutes
+
+          let result;
+
+          switch (handler) {
+            case 'ssh-exec-command':
+            case 'ssh-execute': {
+              console.log(`[IPC Bridge] Executing SSH command on connection ${args[0]}: ${args[1]}`);
+              try {
+                result = await executeSSHCommand(args[0], args[1], null, controller.signal);
+                console.log(`[IPC Bridge] SSH command completed successfully`);
+              } catch (error) {
+                console.error(`[IPC Bridge] SSH command execution failed:`, error);
+                throw error;
               }
+              break;
+            }
 
-              case 'serial-exec-command':
-              case 'serial-execute': {
-                console.log(`[IPC Bridge] Executing Serial command on connection ${args[0]}: ${args[1]}`);
-                try {
-                  result = await executeSerialCommand(args[0], args[1]);
-                  console.log(`[IPC Bridge] Serial command completed successfully`);
-                } catch (error) {
-                  console.error(`[IPC Bridge] Serial command execution failed:`, error);
-                  throw error;
-                }
-                break;
+            case 'telnet-exec-command':
+            case 'telnet-execute': {
+              console.log(`[IPC Bridge] Executing Telnet command on connection ${args[0]}: ${args[1]}`);
+              try {
+                result = await executeTelnetCommand(args[0], args[1]);
+                console.log(`[IPC Bridge] Telnet command completed successfully`);
+              } catch (error) {
+                console.error(`[IPC Bridge] Telnet command execution failed:`, error);
+                throw error;
               }
+              break;
+            }
 
-              case 'local-exec-command':
-              case 'local-execute': {
-                console.log(`[IPC Bridge] Request to execute Local command on connection ${args[0]}: ${args[1]}`);
-                const command = args[1];
-
-                // NOTE: User approval is now handled by the AI Agent logic (System Prompt).
-                // The Agent is instructed to explicitly ask the user for permission using 'ash_ask_user' 
-                // BEFORE calling this execution method. This allows natural language verification ("Yes, I do").
-
-                console.log(`[IPC Bridge] Executing Local command: ${command}`);
-                try {
-                  result = await executeLocalCommand(args[0], command);
-                  console.log(`[IPC Bridge] Local command completed`);
-                } catch (error) {
-                  console.error(`[IPC Bridge] Local command execution failed:`, error);
-                  throw error;
-                }
-                break;
+            case 'serial-exec-command':
+            case 'serial-execute': {
+              console.log(`[IPC Bridge] Executing Serial command on connection ${args[0]}: ${args[1]}`);
+              try {
+                result = await executeSerialCommand(args[0], args[1]);
+                console.log(`[IPC Bridge] Serial command completed successfully`);
+              } catch (error) {
+                console.error(`[IPC Bridge] Serial command execution failed:`, error);
+                throw error;
               }
+              break;
+            }
 
-              case 'ssh-list-connections':
-              case 'list-connections': {
-                // Get all active connections (SSH, Telnet, Serial, Local)
-                const sshConnections = getSSHConnections();
-                const telnetConnections = getTelnetConnections();
-                const serialConnections = getSerialConnections();
-                const localConnections = getLocalSessions();
-
-                console.log(`[IPC Bridge] Listing connections. SSH: ${sshConnections.size}, Telnet: ${telnetConnections.size}, Serial: ${serialConnections.size}, Local: ${localConnections.size}`);
-
-                const sshList = Array.from(sshConnections.entries()).map(([id, conn]) => {
-                  const isConnected = conn !== null && conn !== undefined;
-                  return {
-                    connectionId: id,
-                    type: 'ssh',
-                    connected: isConnected
-                  };
-                });
-
-                const telnetList = Array.from(telnetConnections.entries()).map(([id, connInfo]) => {
-                  const isConnected = connInfo !== null && connInfo !== undefined && connInfo.tSocket !== null;
-                  return {
-                    connectionId: id,
-                    type: 'telnet',
-                    connected: isConnected
-                  };
-                });
-
-                const serialList = Array.from(serialConnections.entries()).map(([id, connInfo]) => {
-                  const isConnected = connInfo && connInfo.port && connInfo.port.isOpen;
-                  return {
-                    connectionId: id,
-                    type: 'serial',
-                    connected: !!isConnected
-                  };
-                });
-
-                const localList = Array.from(localConnections.entries()).map(([id, session]) => {
-                  return {
-                    connectionId: id,
-                    type: 'local',
-                    connected: true
-                  };
-                });
-
-                const connections = [...sshList, ...telnetList, ...serialList, ...localList];
-                result = { success: true, connections };
-                console.log(`[IPC Bridge] Returning ${connections.length} total connections`);
-                break;
+            case 'local-exec-command':
+            case 'local-execute': {
+              console.log(`[IPC Bridge] Request to execute Local command on connection ${args[0]}: ${args[1]}`);
+              const command = args[1];
+
+              // NOTE: User approval is now handled by the AI Agent logic (System Prompt).
+              // The Agent is instructed to explicitly ask the user for permission using 'ash_ask_user' 
+              // BEFORE calling this execution method. This allows natural language verification ("Yes, I do").
+
+              console.log(`[IPC Bridge] Executing Local command: ${command}`);
+              try {
+                result = await executeLocalCommand(args[0], command);
+                console.log(`[IPC Bridge] Local command completed`);
+              } catch (error) {
+                console.error(`[IPC Bridge] Local command execution failed:`, error);
+                throw error;
               }
+              break;
+            }
 
-              case 'ask-user': {
-                const question = args[0];
-                const isPassword = args[1];
-                console.log(`[IPC Bridge] Asking user: ${question} (isPassword=${isPassword})`);
-                result = await requestUserApproval(question, isPassword);
+            case 'exec-command-auto': {
+              // Resolve the connection type and execute in a single round-trip
+              const connectionId = args[0];
+              const command = args[1];
+              const connectionType = resolveConnectionType(connectionId);
+              if (!connectionType) {
+                console.log(`[IPC Bridge] exec-command-auto: connection ${connectionId} not found`);
+                result = { success: false, error: 'not_found', activeConnections: countActiveConnections() };
                 break;
               }
 
-              default:
-                throw new Error(`Unknown IPC handler: ${handler}`);
+              console.log(`[IPC Bridge] Executing ${connectionType} command on connection ${connectionId}: ${command}`);
+              try {
+                const execResult = await executeOnConnection(connectionType, connectionId, command, null, controller.signal);
+                result = { ...execResult, type: connectionType };
+                console.log(`[IPC Bridge] ${connectionType} command completed`);
+              } catch (error) {
+                console.error(`[IPC Bridge] ${connectionType} command execution failed:`, error);
+                throw error;
+              }
+              break;
             }
 
-            res.writeHead(200, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ success: true, result: result }));
-          } catch (error) {
-            const isUserDenial = error.message.includes('denied by user') || error.message.includes('denied permission');
+            case 'ssh-list-connections':
+            case 'list-connections': {
+              // Get all active connections (SSH, Telnet, Serial, Local)
+              const sshConnections = getSSHConnections();
+              const telnetConnections = getTelnetConnections();
+              const serialConnections = getSerialConnections();
+              const localConnections = getLocalSessions();
+
+              console.log(`[IPC Bridge] Listing connections. SSH: ${sshConnections.size}, Telnet: ${telnetConnections.size}, Serial: ${serialConnections.size}, Local: ${localConnections.size}`);
+
+              const sshList = Array.from(sshConnections.entries()).map(([id, conn]) => {
+                const isConnected = conn !== null && conn !== undefined;
+                return {
+                  connectionId: id,
+                  type: 'ssh',
+                  connected: isConnected
+                };
+              });
+
+              const telnetList = Array.from(telnetConnections.entries()).map(([id, connInfo]) => {
+                const isConnected = connInfo !== null && connInfo !== undefined && connInfo.tSocket !== null;
+                return {
+                  connectionId: id,
+                  type: 'telnet',
+                  connected: isConnected
+                };
+              });
+
+              const serialList = Array.from(serialConnections.entries()).map(([id, connInfo]) => {
+                const isConnected = connInfo && connInfo.port && connInfo.port.isOpen;
+                return {
+                  connectionId: id,
+                  type: 'serial',
+                  connected: !!isConnected
+                };
+              });
+
+              const localList = Array.from(localConnections.entries()).map(([id, session]) => {
+                return {
+                  connectionId: id,
+                  type: 'local',
+                  connected: true
+                };
+              });
+
+              const connections = [...sshList, ...telnetList, ...serialList, ...localList];
+              result = { success: true, connections };
+              console.log(`[IPC Bridge] Returning ${connections.length} total connections`);
+              break;
+            }
 
-            if (!isUserDenial) {
-              console.error(`[IPC Bridge] Error for handler ${handler}:`, error);
-            } else {
-              console.log(`[IPC Bridge] Request denied for handler ${handler}: ${error.message}`);
+            case 'ask-user': {
+              const question = args[0];
+              const isPassword = args[1];
+              console.log(`[IPC Bridge] Asking user: ${question} (isPassword=${isPassword})`);
+              result = await requestUserApproval(question, isPassword);
+              break;
             }
 
-            // Return 200 for user denial so it's parsed as a logical error by client, not a server crash
-            // The client (agent_tools.py) checks for success:false in the body
-            const statusCode = isUserDenial ? 200 : 500;
+            default:
+              throw new Error(`Unknown IPC handler: ${handler}`);
+          }
+
+          res.writeHead(200, { 'Content-Type': 'application/json' });
+          res.end(JSON.stringify({ success: true, result: result }));
+        } catch (error) {
+          const isUserDenial = error.message.includes('denied by user') || error.message.includes('denied permission');
 
-            res.writeHead(statusCode, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ success: false, error: error.message }));
+          if (!isUserDenial) {
+            console.error(`[IPC Bridge] Error for handler ${handler}:`, error);
+          } else {
+            console.log(`[IPC Bridge] Request denied for handler ${handler}: ${error.message}`);
           }
-        });
-      } else if (req.method === 'GET' && path === '/health') {
-        res.writeHead(200, { 'Content-Type': 'application/json' });
-        res.end(JSON.stringify({ status: 'ok', port: IPC_BRIDGE_PORT }));
-      } else {
-        res.writeHead(404, { 'Content-Type': 'application/json' });
-        res.end(JSON.stringify({ error: 'Not found' }));
-      }
-    } catch (error) {
-      console.error('IPC bridge server error:', error);
-      res.writeHead(500, { 'Content-Type': 'application/json' });
-      res.end(JSON.stringify({ success: false, error: error.message }));
+
+          // Return 200 for user denial so it's parsed as a logical error by client, not a server crash
+          // The client (agent_tools.py) checks for success:false in the body
+          const statusCode = isUserDenial ? 200 : 500;
+
+          res.writeHead(statusCode, { 'Content-Type': 'application/json' });
+          res.end(JSON.stringify({ success: false, error: error.message }));
+        } finally {
+          unregisterCancellable(requestId);
+        }
+      });
+    } else if (req.method === 'POST' && pathname === '/ipc-invoke-stream') {
+      handleExecStreamRequest(req, res);
+    } else if (req.method === 'POST' && pathname === '/ipc-cancel') {
+      let body = '';
+      req.on('data', chunk => {
+        body += chunk.toString();
+      });
+
+      req.on('end', () => {
+        try {
+          const { request_id: requestId } = JSON.parse(body);
+          const controller = cancellableRequests.get(requestId);
+          if (controller) {
+            console.log(`[IPC Bridge] Cancelling request ${requestId}`);
+            controller.abort();
+            cancellableRequests.delete(requestId);
+          }
+          res.writeHead(200, { 'Content-Type': 'application/json' });
+          res.end(JSON.stringify({ success: true, cancelled: !!controller }));
+        } catch (error) {
+          res.writeHead(400, { 'Content-Type': 'application/json' });
+          res.end(JSON.stringify({ success: false, error: error.message }));
+        }
+      });
+    } else if (req.method === 'GET' && pathname === '/ipc-events') {
+      handleEventsRequest(req, res);
+    } else if (req.method === 'GET' && pathname === '/health') {
+      res.writeHead(200, { 'Content-Type': 'application/json' });
+      res.end(JSON.stringify({ status: 'ok', port: IPC_BRIDGE_PORT }));
+    } else {
+      res.writeHead(404, { 'Content-Type': 'application/json' });
+      res.end(JSON.stringify({ error: 'Not found' }));
     }
-  });
+  } catch (error) {
+    console.error('IPC bridge server error:', error);
+    res.writeHead(500, { 'Content-Type': 'application/json' });
+    res.end(JSON.stringify({ success: false, error: error.message }));
+  }
+}
+
+/**
+ * Start IPC bridge HTTP server
+ */
+export function startIPCBridge() {
+  if (ipcBridgeServer) {
+    console.log('IPC bridge server already running');
+    return;
+  }
+
+  ipcBridgeServer = http.createServer(handleBridgeRequest);
 
   ipcBridgeServer.listen(IPC_BRIDGE_PORT, '127.0.0.1', () => {
     console.log(`✅ IPC bridge server listening on http://127.0.0.1:${IPC_BRIDGE_PORT}`);
@@ -277,6 +526,41 @@ export function startIPCBridge() {
   // Set server timeout to 5 minutes for long-running commands
   ipcBridgeServer.timeout = 300000; // 5 minutes
   ipcBridgeServer.keepAliveTimeout = 300000;
+
+  startIPCBridgeSocket();
+}
+
+/**
+ * Start the Unix domain socket listener (same handler, no TCP/loopback overhead)
+ */
+function startIPCBridgeSocket() {
+  if (!IPC_BRIDGE_SOCKET || ipcBridgeSocketServer) {
+    return;
+  }
+
+  // Remove a stale socket file left behind by a previous instance
+  try {
+    fs.unlinkSync(IPC_BRIDGE_SOCKET);
+  } catch (error) {
+    if (error.code !== 'ENOENT') {
+      console.warn(`⚠️ Could not remove stale IPC socket ${IPC_BRIDGE_SOCKET}: ${error.message}`);
+    }
+  }
+
+  ipcBridgeSocketServer = http.createServer(handleBridgeRequest);
+
+  ipcBridgeSocketServer.listen(IPC_BRIDGE_SOCKET, () => {
+    console.log(`✅ IPC bridge server listening on unix socket ${IPC_BRIDGE_SOCKET}`);
+  });
+
+  ipcBridgeSocketServer.on('error', (error) => {
+    // TCP listener is still available, so the socket is optional
+    console.warn(`⚠️ IPC bridge socket unavailable (${error.message}). Backend will use TCP.`);
+    ipcBridgeSocketServer = null;
+  });
+
+  ipcBridgeSocketServer.timeout = 300000; // 5 minutes
+  ipcBridgeSocketServer.keepAliveTimeout = 300000;
 }
 
 /**
@@ -288,6 +572,13 @@ export function stopIPCBridge() {
     ipcBridgeServer = null;
     console.log('IPC bridge server stopped');
   }
+  if (ipcBridgeSocketServer) {
+    ipcBridgeSocketServer.close(); // Also unlinks the socket file
+    ipcBridgeSocketServer = null;
+  }
+  for (const res of eventSubscribers) {
+    res.end();
+  }
 }
 
 /**
@@ -296,3 +587,10 @@ export function stopIPCBridge() {
 export function getIPCBridgeUrl() {
   return `http://127.0.0.1:${IPC_BRIDGE_PORT}`;
 }
+
+/**
+ * Get IPC bridge Unix socket path (null when not supported on this platform)
+ */
+export function getIPCBridgeSocketPath() {
+  return IPC_BRIDGE_SOCKET;
+}
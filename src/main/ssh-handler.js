@@ -407,7 +407,7 @@ export function setMaxOutputSize(sizeInBytes) {
   }
 }
 
-export async function executeSSHCommand(connectionId, command) {
+export async function executeSSHCommand(connectionId, command, onData = null, signal = null) {
   const sessionConnectionId = connectionId; // IPC bridge parameter name kept for compatibility
   const conn = sshConnections.get(sessionConnectionId);
   if (!conn) {
@@ -427,29 +427,46 @@ export async function executeSSHCommand(connectionId, command) {
 
       const MAX_OUTPUT_SIZE = currentMaxOutputSize;
 
+      // Cancelled by the caller (e.g. the backend gave up waiting): stop the remote command
+      const onAbort = () => {
+        stream.signal('TERM');
+        stream.close();
+        reject(new Error('Command cancelled'));
+      };
+      if (signal) {
+        if (signal.aborted) {
+          onAbort();
+          return;
+        }
+        signal.addEventListener('abort', onAbort, { once: true });
+      }
+
       stream.on('data', (data) => {
         if (output.length < MAX_OUTPUT_SIZE) {
           const chunk = data.toString();
+          let appended = chunk;
           if (output.length + chunk.length > MAX_OUTPUT_SIZE) {
-            output += chunk.substring(0, MAX_OUTPUT_SIZE - output.length) + '\n... [Output Truncated]';
-          } else {
-            output += chunk;
+            appended = chunk.substring(0, MAX_OUTPUT_SIZE - output.length) + '\n... [Output Truncated]';
           }
+          output += appended;
+          if (onData) onData('stdout', appended);
         }
       });
 
       stream.stderr.on('data', (data) => {
         if (errorOutput.length < MAX_OUTPUT_SIZE) {
           const chunk = data.toString();
+          let appended = chunk;
           if (errorOutput.length + chunk.length > MAX_OUTPUT_SIZE) {
-            errorOutput += chunk.substring(0, MAX_OUTPUT_SIZE - errorOutput.length) + '\n... [Output Truncated]';
-          } else {
-            errorOutput += chunk;
+            appended = chunk.substring(0, MAX_OUTPUT_SIZE - errorOutput.length) + '\n... [Output Truncated]';
           }
+          errorOutput += appended;
+          if (onData) onData('stderr', appended);
         }
       });
 
       stream.on('close', (code) => {
+        if (signal) signal.removeEventListener('abort', onAbort);
         resolve({
           success: code === 0,
           output: output.trim(),